@@ -0,0 +1,7 @@
+import sys
+from gdio.batchProcessing import __main__
+
+# runs a script over many level strings or save files at once; see gdio/batchProcessing.py or python batch.py --help
+
+if __name__ == "__main__":
+    __main__(sys.argv[1:])
@@ -0,0 +1,105 @@
+import re
+import sys
+import timeit
+import types
+import typing
+from typing import Any
+from benchmarks.synthetic import generate_level_string
+from gdio.attributeData import obj_attr_map, obj_attr_transform
+from gdio.processLevelData import gdObject, compress_type
+
+# per-object cost of resolving attribute keys while decoding (gdObject construction) and encoding (gdObject.compress),
+# against legacyObject, a copy of gdObject from before the compiled lookup tables that scans obj_attr_map instead
+# run from the repository root with: python -m benchmarks.bench_attribute_registry [objects] [repeat]
+
+
+# gdObject's key resolution as it was: linear scans over obj_attr_map by name, obj_attr_transform by ID
+class legacyObject:
+    def __init__(self, vals: dict[int | str, Any]) -> None:
+        for key in vals:
+            value = vals[key]
+
+            if type(key) == str:
+                if re.match(r"^kA\d+$", key) != None:
+                    value = compress_type(value) != 0
+                else:
+                    if key in map(lambda entry: entry.name, obj_attr_map.values()):
+                        key = next(filter(lambda attr_key: obj_attr_map[attr_key].name == key, obj_attr_map))
+                    else:
+                        raise Exception("Provided key name ({}) not found in list of permitted attributes".format(key))
+            else:
+                if compress_type(key) in obj_attr_transform:
+                    value = obj_attr_transform[compress_type(key)]["decode"](vals[key])
+
+            if compress_type(key) in obj_attr_map:
+                setattr(
+                    self,
+                    obj_attr_map[compress_type(key)].name,
+                    obj_attr_map[compress_type(key)].type(value),
+                )
+            else:
+                setattr(self, str(key), value)
+        assert set(["ID", "x", "y"]).issubset(self.__dict__)
+
+    def compress(self) -> str:
+        obj_attrs = []
+        for key in self.__dict__:
+            value = getattr(self, key)
+
+            mapkey = next((mkey for mkey in obj_attr_map if obj_attr_map[mkey].name == key), key)
+            if mapkey in obj_attr_map:
+                if type(obj_attr_map[mapkey].type) == types.GenericAlias:
+                    aliased_type: types.GenericAlias = obj_attr_map[mapkey].type
+                    if aliased_type.__origin__ == tuple:
+                        for i, indexed_type in enumerate(typing.get_args(aliased_type)):
+                            assert type(value[i]) == indexed_type
+                    elif aliased_type.__origin__ == list:
+                        for i in range(len(value)):
+                            assert type(value[i]) == typing.get_args(aliased_type)[0]
+                else:
+                    assert type(value) == obj_attr_map[mapkey].type
+
+            if type(value) == bool:
+                value = 1 if value else 0
+
+            if mapkey in obj_attr_transform:
+                value = obj_attr_transform[mapkey]["encode"](value)
+
+            obj_attrs.append("{0},{1}".format(mapkey, value))
+        return ",".join(obj_attrs)
+
+
+def __main__(objects=20000, repeat=5):
+    lvlstring = generate_level_string(objects)
+    split_objs = [obj_str.split(",") for obj_str in lvlstring.split(";")[1:-1]]
+    vals = [dict(zip(map(compress_type, split[::2]), split[1::2])) for split in split_objs]
+    named_vals = [{"ID": 1, "x": 45.0, "y": 45.0, "color": 5, "groups": [2, 4], "z-layer": 3} for _ in range(objects)]
+    assert [gdObject(val).compress() for val in vals] == [legacyObject(val).compress() for val in vals]
+
+    def time(func) -> float:
+        return min(timeit.repeat(func, number=1, repeat=repeat)) / objects * 1e6
+
+    print("objects: {0}".format(objects))
+    print("{0:<22}{1:>10}{2:>10}".format("us/object", "legacy", "registry"))
+    for name, legacy, registry in [
+        (
+            "decode (numeric keys)",
+            lambda: [legacyObject(val) for val in vals],
+            lambda: [gdObject(val) for val in vals],
+        ),
+        (
+            "decode (named keys)",
+            lambda: [legacyObject(val) for val in named_vals],
+            lambda: [gdObject(val) for val in named_vals],
+        ),
+        (
+            "encode",
+            lambda objs=[legacyObject(val) for val in vals]: [obj.compress() for obj in objs],
+            lambda objs=[gdObject(val) for val in vals]: [obj.compress() for obj in objs],
+        ),
+    ]:
+        print("{0:<22}{1:>10.2f}{2:>10.2f}".format(name, time(legacy), time(registry)))
+
+
+if __name__ == "__main__":
+    __main__(*map(int, sys.argv[1:]))
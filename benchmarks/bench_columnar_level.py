@@ -0,0 +1,51 @@
+import sys
+import time
+import tracemalloc
+from benchmarks.synthetic import generate_level_string
+import gdio.processLevelData as pl
+import gdio.columnarLevelData as cl
+
+# memory footprint and throughput of the column-wise gdLevel backend against the regular extract_level result
+# run from the repository root with: python -m benchmarks.bench_columnar_level [objects]
+
+
+def measure(extract, lvlstring):
+    tracemalloc.start()
+    lvl = extract(lvlstring)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del lvl
+
+    start = time.perf_counter()
+    lvl = extract(lvlstring)
+    parse = time.perf_counter() - start
+
+    start = time.perf_counter()
+    lvl.objs_printable(lambda obj: False)  # sorts, prints nothing
+    sort = time.perf_counter() - start
+
+    start = time.perf_counter()
+    lvl.map(lambda obj: setattr(obj, "x", obj.x + 30.0), lambda obj: obj.ID == 1)
+    map_ = time.perf_counter() - start
+
+    start = time.perf_counter()
+    lvl.compress()
+    compress = time.perf_counter() - start
+    return memory, parse, sort, map_, compress
+
+
+def __main__(objects=200000):
+    lvlstring = generate_level_string(objects)
+    print("objects: {0}, level string: {1:.1f} MB".format(objects, len(lvlstring) / 1e6))
+    print("{0:<12}{1:>12}{2:>10}{3:>10}{4:>10}{5:>10}".format("backend", "memory", "parse", "sort", "map", "compress"))
+    for name, extract in [("dict", pl.extract_level), ("columnar", cl.extract_columnar_level)]:
+        memory, parse, sort, map_, compress = measure(extract, lvlstring)
+        print(
+            "{0:<12}{1:>9.1f} MB{2:>9.2f}s{3:>9.2f}s{4:>9.2f}s{5:>9.2f}s".format(
+                name, memory / 1e6, parse, sort, map_, compress
+            )
+        )
+
+
+if __name__ == "__main__":
+    __main__(*map(int, sys.argv[1:]))
@@ -0,0 +1,35 @@
+import io
+import sys
+import timeit
+import zlib
+from benchmarks.synthetic import generate_level_string
+import gdio.processLevelData as pl
+
+# level serialization throughput: compress() to a str, compress_to() into a BytesIO, and compress_iter() into zlib
+# run from the repository root with: python -m benchmarks.bench_compress_level [objects]
+
+
+def deflate(lvl):
+    compressor = zlib.compressobj(9, zlib.DEFLATED, -zlib.MAX_WBITS)
+    for chunk in lvl.compress_iter():
+        compressor.compress(chunk)
+    return compressor.flush()
+
+
+def __main__(objects=200000, repeat=3):
+    lvl = pl.extract_level(generate_level_string(objects))
+    size = len(lvl.compress())
+    results = [
+        ("compress", min(timeit.repeat(lambda: lvl.compress(), number=1, repeat=repeat))),
+        ("compress(strict=True)", min(timeit.repeat(lambda: lvl.compress(strict=True), number=1, repeat=repeat))),
+        ("compress_to(BytesIO)", min(timeit.repeat(lambda: lvl.compress_to(io.BytesIO()), number=1, repeat=repeat))),
+        ("compress_iter -> zlib", min(timeit.repeat(lambda: deflate(lvl), number=1, repeat=repeat))),
+    ]
+
+    print("objects: {0}, level string: {1:.1f} MB".format(objects, size / 1e6))
+    for name, elapsed in results:
+        print("{0:<24}{1:>6.2f}s ({2:.2f} us/object)".format(name, elapsed, elapsed / objects * 1e6))
+
+
+if __name__ == "__main__":
+    __main__(*map(int, sys.argv[1:]))
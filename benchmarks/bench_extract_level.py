@@ -0,0 +1,21 @@
+import sys
+import timeit
+from benchmarks.synthetic import generate_level_string
+import gdio.processLevelData as pl
+
+# level string parsing throughput: the full extract_level, and counting/filtering through iter_objects
+# run from the repository root with: python -m benchmarks.bench_extract_level [objects]
+
+
+def __main__(objects=200000, repeat=3):
+    lvlstring = generate_level_string(objects)
+    extract = min(timeit.repeat(lambda: pl.extract_level(lvlstring), number=1, repeat=repeat))
+    count = min(timeit.repeat(lambda: sum(1 for obj in pl.iter_objects(lvlstring) if obj.ID == 901), number=1, repeat=repeat))
+
+    print("objects: {0}, level string: {1:.1f} MB".format(objects, len(lvlstring) / 1e6))
+    print("extract_level:              {0:.2f}s ({1:.2f} us/object)".format(extract, extract / objects * 1e6))
+    print("iter_objects (count 901s):  {0:.2f}s ({1:.2f} us/object)".format(count, count / objects * 1e6))
+
+
+if __name__ == "__main__":
+    __main__(*map(int, sys.argv[1:]))
@@ -0,0 +1,79 @@
+import base64
+import sys
+import timeit
+import zlib
+from benchmarks.synthetic import generate_save_xml
+import gdio.levelStringImporter as lsi
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# CCLocalLevels.dat round trip: encode_gamesave/decode_gamesave, with the xor/base64 transcoding step broken out
+# against the per-byte xor loop it replaced (and a numpy version of it, if numpy is installed), and the zlib work on
+# its own for reference
+# run from the repository root with: python -m benchmarks.bench_gamesave [levels] [objects per level]
+
+base64_alphabet = b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/"
+
+
+def legacy_xor(data, key):
+    return bytearray([i ^ key for i in data]).decode()
+
+
+# xor + alphabet swap and base64 as numpy array operations, for comparison with bytes.translate and binascii
+def numpy_decode(data: bytes) -> bytes:
+    translated = numpy.frombuffer(lsi.gamesave_decode_table, numpy.uint8)[numpy.frombuffer(data, numpy.uint8)]
+    values = numpy.zeros(256, numpy.uint32)
+    values[numpy.frombuffer(base64_alphabet, numpy.uint8)] = numpy.arange(64)
+    quads = values[translated[translated != ord("=")]]
+    quads = quads[: len(quads) // 4 * 4].reshape(-1, 4)
+    words = (quads[:, 0] << 18) | (quads[:, 1] << 12) | (quads[:, 2] << 6) | quads[:, 3]
+    return numpy.stack([words >> 16, words >> 8, words], axis=1).astype(numpy.uint8).tobytes()
+
+
+def numpy_encode(data: bytes) -> bytes:
+    triples = numpy.frombuffer(data[: len(data) // 3 * 3], numpy.uint8).reshape(-1, 3).astype(numpy.uint32)
+    words = (triples[:, 0] << 16) | (triples[:, 1] << 8) | triples[:, 2]
+    sextets = numpy.stack([words >> 18, (words >> 12) & 63, (words >> 6) & 63, words & 63], axis=1)
+    alphabet = numpy.frombuffer(lsi.gamesave_encode_table, numpy.uint8)[numpy.frombuffer(base64_alphabet, numpy.uint8)]
+    return alphabet[sextets].tobytes()
+
+
+def __main__(levels=20, objects=20000, repeat=3):
+    xml = generate_save_xml(levels, objects)
+    save = lsi.encode_gamesave(xml)
+    assert lsi.decode_gamesave(save) == xml
+    deflated = zlib.compress(xml)
+    time = lambda func: min(timeit.repeat(func, number=1, repeat=repeat))
+
+    decoded = base64.b64decode(save.translate(lsi.gamesave_decode_table, b"\x0b"))
+    results = [
+        ("decode_gamesave", time(lambda: lsi.decode_gamesave(save))),
+        ("encode_gamesave", time(lambda: lsi.encode_gamesave(xml))),
+        ("  transcode (translate)", time(lambda: save.translate(lsi.gamesave_decode_table, b"\x0b"))),
+        ("  transcode (legacy xor)", time(lambda: lsi.decryptreplace(legacy_xor(save, 11)).encode())),
+        ("  decode (translate+b64)", time(lambda: base64.b64decode(save.translate(lsi.gamesave_decode_table, b"\x0b")))),
+        ("  encode (b64+translate)", time(lambda: base64.b64encode(decoded).translate(lsi.gamesave_encode_table))),
+    ]
+    if numpy != None:
+        usable = len(decoded) // 3 * 3  # the numpy versions skip base64 padding
+        assert numpy_decode(save)[:usable] == decoded[:usable]
+        assert numpy_encode(decoded) == base64.b64encode(decoded[:usable]).translate(lsi.gamesave_encode_table)
+        results += [
+            ("  decode (numpy)", time(lambda: numpy_decode(save))),
+            ("  encode (numpy)", time(lambda: numpy_encode(decoded))),
+        ]
+    results += [
+        ("  zlib decompress only", time(lambda: zlib.decompress(deflated))),
+        ("  zlib compress only", time(lambda: zlib.compress(xml))),
+    ]
+
+    print("save file: {0:.1f} MB, XML: {1:.1f} MB".format(len(save) / 1e6, len(xml) / 1e6))
+    for name, elapsed in results:
+        print("{0:<26}{1:>8.3f}s".format(name, elapsed))
+
+
+if __name__ == "__main__":
+    __main__(*map(int, sys.argv[1:]))
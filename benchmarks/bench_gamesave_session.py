@@ -0,0 +1,52 @@
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from benchmarks.synthetic import generate_save_xml
+import gdio.levelStringImporter as lsi
+
+# editing n levels of a save: one gdGameSave session against n separate read_leveldata/write_leveldata calls.
+# the edit itself is a plain string edit (adding one block), so the numbers show the save handling overhead.
+# run from the repository root with: python -m benchmarks.bench_gamesave_session [levels] [objects per level]
+
+extra_object = "1,1,2,15,3,15;"
+
+
+def separate_calls(levels: int) -> None:
+    for _ in range(levels):  # read_leveldata/write_leveldata only reach the topmost level, which is as expensive
+        lvldata = lsi.read_leveldata(decrypt_lvlstring=False)
+        lvlstring = lsi.decrypt(lvldata["k4"]).decode() + extra_object
+        lsi.write_leveldata(lvlstring)
+
+
+def session(levels: int) -> None:
+    save = lsi.gdGameSave()
+    for saved in save.levels[:levels]:
+        saved.lvlstring += extra_object
+    save.save()
+
+
+def __main__(levels=20, objects=5000):
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)  # update_runs writes runs.txt to the working directory
+        lsi.gamedir = tmp + os.sep
+        try:
+            xml = generate_save_xml(levels, objects)
+            print("save: {0} levels x {1} objects, {2:.1f} MB".format(levels, objects, len(xml) / 1e6))
+            for name, func in [("separate calls", separate_calls), ("gdGameSave", session)]:
+                with open(lsi.gamedir + lsi.locallevels, "wb") as f:
+                    f.write(lsi.encode_gamesave(xml))
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    func(levels)
+                print("{0:<16}{1:>7.2f}s".format(name, time.perf_counter() - start))
+        finally:
+            lsi.flush_runs()  # while runs.txt's directory still exists
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    __main__(*map(int, sys.argv[1:]))
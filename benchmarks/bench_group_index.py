@@ -0,0 +1,75 @@
+import sys
+import time
+from benchmarks.synthetic import generate_level_string
+import gdio.processLevelData as pl
+
+# a group remap over a trigger-heavy level: every trigger targeting one of the remapped groups is retargeted and
+# every object in it moves to the new group. done with map/filter scans, then through the level's group indexes.
+# run from the repository root with: python -m benchmarks.bench_group_index [triggers] [groups]
+
+
+def remap_by_scan(lvl: pl.gdLevel, mapping: dict[int, int]) -> None:
+    for old, new in mapping.items():
+        lvl.map(
+            lambda obj: setattr(obj, "trigger-group-target", new),
+            lambda obj: getattr(obj, "trigger-group-target", None) == old,
+        )
+        lvl.map(
+            lambda obj: setattr(obj, "groups", [new if group == old else group for group in obj.groups]),
+            lambda obj: old in getattr(obj, "groups", ()),
+        )
+
+
+def remap_by_index(lvl: pl.gdLevel, mapping: dict[int, int]) -> None:
+    for old, new in mapping.items():
+        for obj in lvl.triggers_targeting(old):
+            setattr(obj, "trigger-group-target", new)
+        for obj in lvl.objects_in_group(old):
+            obj.groups = [new if group == old else group for group in obj.groups]
+
+
+def __main__(triggers=10000, groups=200):
+    lvlstring = generate_level_string(int(triggers / 0.18))  # ~18% of synthetic objects are triggers
+    mapping = {group: group + 1000 for group in range(1, groups + 1)}
+
+    lvl = pl.extract_level(lvlstring)
+    print(
+        "objects: {0}, triggers: {1}, remapped groups: {2}".format(
+            len(lvl.objs), sum(1 for obj in lvl.objs if obj.ID in (901, 899, 1006)), groups
+        )
+    )
+    start = time.perf_counter()
+    remap_by_scan(lvl, mapping)
+    scan = time.perf_counter() - start
+    expected = lvl.compress()
+
+    lvl = pl.extract_level(lvlstring)
+    start = time.perf_counter()
+    lvl.objects_in_group(0), lvl.triggers_targeting(0)  # builds both indexes
+    build = time.perf_counter() - start
+    start = time.perf_counter()
+    remap_by_index(lvl, mapping)
+    indexed = time.perf_counter() - start
+    assert lvl.compress() == expected
+
+    channels = [col.ID for col in lvl.cols] * 1000
+    start = time.perf_counter()
+    for channel in channels:
+        next(filter(lambda col: col.ID == channel, lvl.cols), None)
+    linear = time.perf_counter() - start
+    start = time.perf_counter()
+    for channel in channels:
+        lvl.get_color_channel(channel)
+    lookup = time.perf_counter() - start
+
+    print("remap by scan:     {0:.2f}s".format(scan))
+    print("remap by index:    {0:.2f}s (+{1:.2f}s to build the indexes)".format(indexed, build))
+    print(
+        "color channel lookup ({0} channels): {1:.2f} us/call (linear search: {2:.2f} us/call)".format(
+            len(lvl.cols), lookup / len(channels) * 1e6, linear / len(channels) * 1e6
+        )
+    )
+
+
+if __name__ == "__main__":
+    __main__(*map(int, sys.argv[1:]))
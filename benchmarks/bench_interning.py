@@ -0,0 +1,57 @@
+import random
+import sys
+import timeit
+import tracemalloc
+from benchmarks.synthetic import generate_level_string, generate_object_string, level_headers
+from gdio.objectInterning import gdInterner
+import gdio.processLevelData as pl
+
+# reading and writing a level with and without a gdInterner, on a level built from a few hundred distinct objects
+# copied all over the place (like a decorated level) and on the default synthetic level, where few objects repeat.
+# reports parse and compress times and the memory the parsed objects take up
+# run from the repository root with: python -m benchmarks.bench_interning [objects] [designs]
+
+
+# a level string of objects objects, each a copy of one of designs different objects at a random position
+def decorated_level_string(objects: int, designs: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    stamps = [generate_object_string(rng).split(",", 6) for _ in range(designs)]
+    segments = []
+    for _ in range(objects):
+        head = list(rng.choice(stamps))
+        head[3] = str(rng.randrange(0, 10000) * 15)
+        head[5] = str(rng.randrange(0, 200) * 15)
+        segments.append(",".join(head) + ";")
+    return "kS38,1_255_2_255_3_255_11_255_12_255_13_255_4_-1_6_1_7_1_15_1_18_0_8_1|" + level_headers + "".join(segments)
+
+
+def measure(lvlstring: str, make_interner, repeat: int) -> tuple[float, float, int]:
+    time = lambda func: min(timeit.repeat(func, number=1, repeat=repeat))
+    parse = time(lambda: pl.extract_level(lvlstring, interner=make_interner()))
+    tracemalloc.start()
+    lvl = pl.extract_level(lvlstring, interner=make_interner())
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    lvl.compress()  # fills the templates' encoding once
+    return parse, time(lambda: lvl.compress()), memory
+
+
+def __main__(objects=100000, designs=300, repeat=3):
+    levels = [
+        ("decorated ({0} designs)".format(designs), decorated_level_string(objects, designs)),
+        ("default synthetic", generate_level_string(objects)),
+    ]
+    print("objects: {0}".format(objects))
+    print("{0:<32}{1:>10}{2:>12}{3:>10}".format("", "parse", "compress", "memory"))
+    for name, lvlstring in levels:
+        for label, make_interner in (("", lambda: None), (", interned", gdInterner)):
+            parse, compress, memory = measure(lvlstring, make_interner, repeat)
+            print(
+                "{0:<32}{1:>9.0f}ms{2:>10.0f}ms{3:>8.1f}MB".format(
+                    name + label, parse * 1000, compress * 1000, memory / 1e6
+                )
+            )
+
+
+if __name__ == "__main__":
+    __main__(*map(int, sys.argv[1:]))
@@ -0,0 +1,38 @@
+import sys
+import time
+from benchmarks.synthetic import generate_level_string
+import gdio.processLevelData as pl
+
+# parse -> edit 1% of objects -> compress, with eager objects against gdLazyObjects, next to a plain string copy
+# run from the repository root with: python -m benchmarks.bench_lazy_objects [objects]
+
+
+def round_trip(lvlstring: str, lazy: bool) -> tuple[float, float, float]:
+    start = time.perf_counter()
+    lvl = pl.extract_level(lvlstring, lazy)
+    parsed = time.perf_counter()
+    for obj in lvl.objs[::100]:
+        obj.groups = getattr(obj, "groups", []) + [999]
+    edited = time.perf_counter()
+    lvl.compress()
+    return parsed - start, edited - parsed, time.perf_counter() - edited
+
+
+def __main__(objects=200000):
+    lvlstring = generate_level_string(objects)
+    start = time.perf_counter()
+    "".join(lvlstring.split(";"))  # a copy that touches every segment
+    copy = time.perf_counter() - start
+
+    print("objects: {0}, level string: {1:.1f} MB".format(objects, len(lvlstring) / 1e6))
+    print("{0:<14}{1:>8}{2:>8}{3:>10}{4:>8}".format("", "parse", "edit", "compress", "total"))
+    for name, lazy in [("eager", False), ("lazy", True)]:
+        parse, edit, compress = round_trip(lvlstring, lazy)
+        print(
+            "{0:<14}{1:>7.2f}s{2:>7.2f}s{3:>9.2f}s{4:>7.2f}s".format(name, parse, edit, compress, parse + edit + compress)
+        )
+    print("{0:<14}{1:>40.2f}s".format("string copy", copy))
+
+
+if __name__ == "__main__":
+    __main__(*map(int, sys.argv[1:]))
@@ -0,0 +1,43 @@
+import os
+import sys
+import tempfile
+import time
+from benchmarks.synthetic import generate_level_string
+import gdio.levelStringImporter as lsi
+import gdio.processLevelData as pl
+from gdio.levelCache import gdLevelCache
+
+# extract_level with a cold and a warm gdLevelCache against no cache, plus opening a cached level of a save
+# (which also skips decrypting k4). run from the repository root with: python -m benchmarks.bench_level_cache [objects]
+
+
+def timed(func) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def __main__(objects=200000):
+    lvlstring = generate_level_string(objects)
+    encrypted = lsi.encrypt(lvlstring.encode())
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = gdLevelCache(tmp)
+        parse = timed(lambda: pl.extract_level(lvlstring))
+        cold = timed(lambda: pl.extract_level(lvlstring, cache=cache))
+        warm = timed(lambda: pl.extract_level(lvlstring, cache=cache))
+        size = sum(entry.stat().st_size for entry in os.scandir(tmp))
+
+        decrypt_parse = timed(lambda: pl.extract_level(lsi.decrypt(encrypted).decode()))
+        cache.put(encrypted, pl.extract_level(lvlstring))
+        k4_hit = timed(lambda: cache.get(encrypted))
+
+    print("objects: {0}, level string: {1:.1f} MB".format(objects, len(lvlstring) / 1e6))
+    print("extract_level, no cache:    {0:.2f}s".format(parse))
+    print("extract_level, cache miss:  {0:.2f}s (entry: {1:.1f} MB)".format(cold, size / 1e6))
+    print("extract_level, cache hit:   {0:.2f}s".format(warm))
+    print("k4 decrypt + parse:         {0:.2f}s".format(decrypt_parse))
+    print("k4 cache hit:               {0:.2f}s".format(k4_hit))
+
+
+if __name__ == "__main__":
+    __main__(*map(int, sys.argv[1:]))
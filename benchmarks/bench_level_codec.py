@@ -0,0 +1,78 @@
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from benchmarks.synthetic import generate_level_string
+
+# peak memory and time of the level string codec (gzip + base64), whole-string decrypt/encrypt against the
+# streaming decrypt_stream/encrypt_stream. every case runs in a fresh interpreter so peak RSS isn't shared.
+# run from the repository root with: python -m benchmarks.bench_level_codec [megabytes]
+
+
+# peak resident set size of this process in bytes; ru_maxrss survives fork/exec on linux, so the (per address
+# space) high water mark is read from /proc where available
+def peak_rss() -> int:
+    if os.path.exists("/proc/self/status"):
+        with open("/proc/self/status") as f:
+            return next(int(line.split()[1]) for line in f if line.startswith("VmHWM")) * 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def run_case(case: str, src: str, dst: str) -> None:
+    import gdio.levelStringImporter as lsi
+
+    baseline = peak_rss()
+    start = time.perf_counter()
+    if case == "decrypt":
+        with open(src, "r") as f:
+            data = lsi.decrypt(f.read())
+        with open(dst, "wb") as f:
+            f.write(data)
+    elif case == "encrypt":
+        with open(src, "rb") as f:
+            data = lsi.encrypt(f.read())
+        with open(dst, "w") as f:
+            f.write(data)
+    elif case == "decrypt_stream":
+        with open(src, "rb") as f, open(dst, "wb") as out:
+            lsi.decrypt_stream(f, out)
+    elif case.startswith("encrypt_stream"):  # encrypt_stream or encrypt_stream:<compression level>
+        with open(src, "rb") as f, open(dst, "wb") as out:
+            lsi.encrypt_stream(f, out, int(case.partition(":")[2] or 9))
+    elapsed = time.perf_counter() - start
+    print(elapsed, peak_rss() - baseline)
+
+
+def __main__(megabytes=50):
+    with tempfile.TemporaryDirectory() as tmp:
+        raw, encoded, out = [os.path.join(tmp, name) for name in ("level.txt", "level.b64", "out")]
+        lvlstring = generate_level_string(int(megabytes * 1e6 / 39))  # ~39 bytes per synthetic object
+        with open(raw, "w") as f:
+            f.write(lvlstring)
+        del lvlstring
+        subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_level_codec", "--case", "encrypt", raw, encoded], capture_output=True
+        )
+
+        print("level string: {0:.1f} MB".format(os.path.getsize(raw) / 1e6))
+        print("{0:<18}{1:>8}{2:>14}{3:>12}".format("case", "time", "peak RSS", "output"))
+        cases = [("decrypt", encoded), ("decrypt_stream", encoded), ("encrypt", raw), ("encrypt_stream", raw)]
+        for case, src in cases + [("encrypt_stream:1", raw)]:
+            result = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_level_codec", "--case", case, src, out],
+                capture_output=True,
+                text=True,
+            )
+            elapsed, peak = map(float, result.stdout.split())
+            print(
+                "{0:<18}{1:>7.2f}s{2:>11.1f} MB{3:>9.1f} MB".format(case, elapsed, peak / 1e6, os.path.getsize(out) / 1e6)
+            )
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--case"]:
+        run_case(*sys.argv[2:5])
+    else:
+        __main__(*map(float, sys.argv[1:]))
@@ -0,0 +1,42 @@
+import sys
+import time
+from benchmarks.synthetic import generate_level_string
+import gdio.processLevelData as pl
+from gdio.levelPatch import apply_patch
+
+# writing back a level after changing a handful of objects: compressing the whole level against applying the
+# tracked changes to the original level string. run from the repository root with:
+# python -m benchmarks.bench_level_patch [objects] [changed objects]
+
+
+def __main__(objects=200000, changed=3):
+    lvlstring = generate_level_string(objects)
+
+    start = time.perf_counter()
+    lvl = pl.extract_level(lvlstring, track_changes=True)
+    load = time.perf_counter() - start
+    start = time.perf_counter()
+    pl.extract_level(lvlstring)
+    load_untracked = time.perf_counter() - start
+
+    for obj in lvl.objs[:changed]:
+        obj.x = obj.x + 30.0
+
+    start = time.perf_counter()
+    lvl.compress()
+    compress = time.perf_counter() - start
+
+    start = time.perf_counter()
+    patch = lvl.changes()
+    patched = apply_patch(lvlstring, patch)
+    apply = time.perf_counter() - start
+    assert len(patched) >= len(lvlstring)
+
+    print("objects: {0}, changed: {1}, level string: {2:.1f} MB".format(objects, changed, len(lvlstring) / 1e6))
+    print("extract_level:                     {0:.2f}s ({1:.2f}s without tracking)".format(load, load_untracked))
+    print("write back with compress:          {0:.3f}s".format(compress))
+    print("write back with changes + patch:   {0:.3f}s (patch: {1} bytes as JSON)".format(apply, len(patch.dumps())))
+
+
+if __name__ == "__main__":
+    __main__(*map(int, sys.argv[1:]))
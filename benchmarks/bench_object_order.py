@@ -0,0 +1,45 @@
+import sys
+import timeit
+from benchmarks.synthetic import generate_level_string
+from gdio.objectOrder import order_key
+import gdio.processLevelData as pl
+
+# an editing loop (add a few objects, move a few, put the level back in order) with the level keeping track of its
+# order, against sorting every object again each time as objs_printable used to
+# run from the repository root with: python -m benchmarks.bench_object_order [objects] [edits]
+
+
+def edit(lvl: pl.gdLevel, edits: int, step: list) -> None:
+    for i in range(edits):
+        step[0] += 1
+        lvl.objs.append(pl.gdObject({"ID": 1, "x": float(step[0] * 37 % 90000), "y": 15.0}))
+        obj = lvl.objs[step[0] * 7919 % len(lvl.objs)]
+        obj.x += 30
+
+
+def __main__(objects=200000, edits=10, repeat=5):
+    lvl = pl.extract_level(generate_level_string(objects))
+    step = [0]
+    time = lambda func: min(timeit.repeat(func, number=1, repeat=repeat))
+
+    def resort() -> None:
+        edit(lvl, edits, step)
+        lvl.objs.sort(key=lambda obj: (getattr(obj, "x"), getattr(obj, "y"), getattr(obj, "ID")))
+
+    def tracked() -> None:
+        edit(lvl, edits, step)
+        lvl.sort_objs(track=True)
+
+    results = [("full sort", time(resort))]
+    lvl.sort_objs(track=True)  # start keeping track
+    results.append(("tracked order", time(tracked)))
+    keys = [order_key(obj) for obj in lvl.objs]
+    assert keys == sorted(keys)
+
+    print("objects: {0}, added and moved per round: {1} + {1}".format(objects, edits))
+    for name, elapsed in results:
+        print("{0:<16}{1:>9.2f} ms".format(name, elapsed * 1000))
+
+
+if __name__ == "__main__":
+    __main__(*map(int, sys.argv[1:]))
@@ -0,0 +1,34 @@
+import os
+import sys
+import time
+from benchmarks.synthetic import generate_level_string
+import gdio.processLevelData as pl
+
+# extract_level and gdLevel.compress on one core against a process pool, for increasing worker counts
+# run from the repository root with: python -m benchmarks.bench_parallel [objects] [max workers]
+
+
+def __main__(objects=500000, max_workers=os.cpu_count() or 1):
+    lvlstring = generate_level_string(objects)
+    print("objects: {0}, level string: {1:.1f} MB, cores: {2}".format(objects, len(lvlstring) / 1e6, os.cpu_count()))
+    print("{0:<10}{1:>10}{2:>8}{3:>12}".format("workers", "extract", "chunks", "compress"))
+    workers = 1
+    while True:
+        start = time.perf_counter()
+        lvl = pl.extract_level(lvlstring, workers=workers)
+        extract = time.perf_counter() - start
+
+        assert lvl.compress(workers=workers) == lvl.compress()
+        start = time.perf_counter()
+        lvl.compress(workers=workers)
+        compress = time.perf_counter() - start
+
+        chunks = pl.parallel_chunks(objects, workers)
+        print("{0:<10}{1:>9.2f}s{2:>8}{3:>11.2f}s".format(workers, extract, chunks, compress))
+        if workers >= max_workers:
+            break
+        workers = min(workers * 2, max_workers)
+
+
+if __name__ == "__main__":
+    __main__(*map(int, sys.argv[1:]))
@@ -0,0 +1,47 @@
+import sys
+import timeit
+from benchmarks.synthetic import generate_level_string
+from gdio.pipelineProfiler import gdProfiler, stage
+import gdio.levelStringImporter as lsi
+import gdio.processLevelData as pl
+
+# cost of the pipeline instrumentation: a parse/compress/encrypt round trip with no profiler, with one running, and
+# with codec timing on, plus the bare cost of entering an idle stage; prints the profiler's report at the end
+# run from the repository root with: python -m benchmarks.bench_profiler [objects]
+
+
+def round_trip(lvlstring: str) -> None:
+    lsi.encrypt(pl.extract_level(lvlstring).compress_iter())
+
+
+def profiled(lvlstring: str, codecs: bool) -> gdProfiler:
+    with gdProfiler(codecs=codecs) as profiler:
+        round_trip(lvlstring)
+    return profiler
+
+
+def idle_stages(n: int) -> None:
+    for _ in range(n):
+        with stage("idle") as timing:
+            timing.count(objects=1)
+
+
+def __main__(objects=200000, repeat=3):
+    lvlstring = generate_level_string(objects)
+    time = lambda func: min(timeit.repeat(func, number=1, repeat=repeat))
+    off = time(lambda: round_trip(lvlstring))
+    on = time(lambda: profiled(lvlstring, False))
+    codecs = time(lambda: profiled(lvlstring, True))
+    idle = time(lambda: idle_stages(100000)) / 100000
+
+    print("objects: {0}, level string: {1:.1f} MB".format(objects, len(lvlstring) / 1e6))
+    print("round trip, no profiler:    {0:.2f}s".format(off))
+    print("round trip, profiled:       {0:.2f}s ({1:+.1%})".format(on, on / off - 1))
+    print("round trip, codecs timed:   {0:.2f}s ({1:+.1%})".format(codecs, codecs / off - 1))
+    print("idle stage:                 {0:.0f} ns".format(idle * 1e9))
+    print()
+    print(profiled(lvlstring, True))
+
+
+if __name__ == "__main__":
+    __main__(*map(int, sys.argv[1:]))
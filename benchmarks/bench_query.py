@@ -0,0 +1,45 @@
+import sys
+import timeit
+from benchmarks.synthetic import generate_level_string
+from gdio.columnarLevelData import to_columnar_level
+from gdio.levelQuery import between, contains, in_
+import gdio.processLevelData as pl
+
+# declarative queries against the lambda filters they replace: the same selection as a list comprehension of
+# getattr calls, as a query scanning the level, as a query answered from the level's indexes, and on a columnar level
+# run from the repository root with: python -m benchmarks.bench_query [objects]
+
+
+def lambda_filter(obj) -> bool:
+    return (
+        getattr(obj, "ID") in (1, 899, 901)
+        and 0 <= getattr(obj, "x") <= 30000
+        and 42 in getattr(obj, "groups", [])
+    )
+
+
+def __main__(objects=200000, repeat=3):
+    lvl = pl.extract_level(generate_level_string(objects))
+    columnar = to_columnar_level(lvl)
+    conditions = dict(ID=in_(1, 899, 901), x=between(0, 30000), groups=contains(42))
+    time = lambda func: min(timeit.repeat(func, number=1, repeat=repeat))
+
+    expected = [obj for obj in lvl.objs if lambda_filter(obj)]
+    assert lvl.query(conditions).list() == expected
+    results = [("lambda filter", time(lambda: [obj for obj in lvl.objs if lambda_filter(obj)]))]
+    results.append(("query, scan", time(lambda: lvl.query(conditions).list())))
+    results.append(("query, count only", time(lambda: lvl.query(conditions).count())))
+    lvl.attribute_index("groups")
+    results.append(("query, groups index", time(lambda: lvl.query(conditions).list())))
+    indexed = lvl.query(conditions).explain()
+    results.append(("columnar, lambda filter", time(lambda: [obj for obj in columnar.objs if lambda_filter(obj)])))
+    results.append(("columnar, column scan", time(lambda: columnar.query(conditions).list())))
+
+    print("objects: {0}, matches: {1}".format(objects, len(expected)))
+    print("plan with index: " + indexed)
+    for name, elapsed in results:
+        print("{0:<26}{1:>9.2f} ms".format(name, elapsed * 1000))
+
+
+if __name__ == "__main__":
+    __main__(*map(int, sys.argv[1:]))
@@ -0,0 +1,67 @@
+import os
+import sys
+import tempfile
+import time
+from benchmarks.synthetic import generate_save_xml
+import gdio.levelStringImporter as lsi
+
+# how long a script is held up by saving: encrypt_gamesave (compress + atomic write, blocking) against queueing the
+# same saves on a gdSaveWriter, where back-to-back saves are coalesced; and the cost of the run counter alone
+# run from the repository root with: python -m benchmarks.bench_save_writer [levels] [objects per level] [saves]
+
+extra_object = "1,1,2,15,3,15;"
+
+
+# a session's save followed by write_leveldata before either is written: both edits have to end up in the file
+def check_mixed_saves(path: str) -> None:
+    with lsi.gdSaveWriter() as writer, writer.condition:  # holding the writer back until both are queued
+        save = lsi.gdGameSave(path)
+        save.levels[1].lvlstring += extra_object
+        save.save(writer=writer)
+        lsi.write_leveldata(save.levels[0].lvlstring + extra_object, path=path, writer=writer)
+    assert writer.writes == 1 and writer.coalesced == 1
+    saved = lsi.gdGameSave(path)
+    assert saved.levels[0].lvlstring.endswith(extra_object) and saved.levels[1].lvlstring.endswith(extra_object)
+
+
+def __main__(levels=4, objects=50000, saves=5):
+    xml = generate_save_xml(levels, objects)
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="gdio-bench-") as directory:
+        path = os.path.join(directory, lsi.locallevels)
+        os.chdir(directory)  # runs.txt goes here
+        try:
+            started = time.perf_counter()
+            for _ in range(saves):
+                lsi.encrypt_gamesave(xml, path=path)
+            blocking = time.perf_counter() - started
+
+            writer = lsi.gdSaveWriter()
+            started = time.perf_counter()
+            for _ in range(saves):
+                writer.save(xml, path)
+            queued = time.perf_counter() - started
+            writer.flush()
+            flushed = time.perf_counter() - started
+            assert lsi.decrypt_gamesave(path) == xml
+            check_mixed_saves(path)
+
+            started = time.perf_counter()
+            for _ in range(1000):
+                lsi.update_runs()
+            counter = (time.perf_counter() - started) / 1000
+        finally:
+            lsi.flush_runs()  # while runs.txt's directory still exists
+            os.chdir(cwd)
+
+    print("save file: {0:.1f} MB XML, {1} saves".format(len(xml) / 1e6, saves))
+    print("encrypt_gamesave (blocking):   {0:.3f}s".format(blocking))
+    print("gdSaveWriter, until returned:  {0:.3f}s".format(queued))
+    print("gdSaveWriter, until flushed:   {0:.3f}s ({1} written, {2} coalesced)".format(
+        flushed, writer.writes, writer.coalesced
+    ))
+    print("update_runs:                   {0:.1f} us".format(counter * 1e6))
+
+
+if __name__ == "__main__":
+    __main__(*map(int, sys.argv[1:]))
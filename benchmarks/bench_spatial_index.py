@@ -0,0 +1,71 @@
+import random
+import sys
+import time
+from benchmarks.synthetic import generate_level_string
+import gdio.processLevelData as pl
+
+# region and neighborhood queries through the spatial index against scanning every object with a filter
+# run from the repository root with: python -m benchmarks.bench_spatial_index [objects] [queries]
+
+
+def scan(lvl: pl.gdLevel, test) -> list[pl.gdObject]:
+    found = []
+    lvl.map(found.append, test)
+    return found
+
+
+def __main__(objects=200000, queries=200):
+    lvl = pl.extract_level(generate_level_string(objects))
+    rng = random.Random(0)
+    points = [(rng.uniform(0, 150000), rng.uniform(0, 3000)) for _ in range(queries)]
+
+    start = time.perf_counter()
+    lvl.spatial_index()
+    build = time.perf_counter() - start
+
+    cases = [
+        (
+            "x range (300 units)",
+            lambda x, y: lvl.objects_in_x_range(x, x + 300),
+            lambda x, y: scan(lvl, lambda obj: x <= obj.x <= x + 300),
+        ),
+        (
+            "rect (300x300)",
+            lambda x, y: lvl.objects_in_rect(x, y, x + 300, y + 300),
+            lambda x, y: scan(lvl, lambda obj: x <= obj.x <= x + 300 and y <= obj.y <= y + 300),
+        ),
+        (
+            "radius (90)",
+            lambda x, y: lvl.objects_within(x, y, 90),
+            lambda x, y: scan(lvl, lambda obj: (obj.x - x) ** 2 + (obj.y - y) ** 2 <= 90**2),
+        ),
+        (
+            "10 nearest",
+            lambda x, y: lvl.nearest_objects(x, y, 10),
+            lambda x, y: sorted(lvl.objs, key=lambda obj: (obj.x - x) ** 2 + (obj.y - y) ** 2)[:10],
+        ),
+    ]
+
+    print("objects: {0}, queries: {1}, index build: {2:.2f}s".format(objects, queries, build))
+    print("{0:<22}{1:>14}{2:>14}".format("query", "index", "scan"))
+    for name, indexed, scanned in cases:
+        start = time.perf_counter()
+        for x, y in points:
+            indexed(x, y)
+        index_time = (time.perf_counter() - start) / queries
+
+        scan_points = points[: max(1, queries // 20)]  # scanning is slow enough that a sample will do
+        start = time.perf_counter()
+        for x, y in scan_points:
+            scanned(x, y)
+        scan_time = (time.perf_counter() - start) / len(scan_points)
+        print("{0:<22}{1:>11.1f} us{2:>11.1f} ms".format(name, index_time * 1e6, scan_time * 1e3))
+
+    # moving objects keeps the index up to date
+    start = time.perf_counter()
+    lvl.map(lambda obj: setattr(obj, "x", obj.x + 30.0), lambda obj: obj.ID == 1)
+    print("moving every ID 1 block with the index live: {0:.2f}s".format(time.perf_counter() - start))
+
+
+if __name__ == "__main__":
+    __main__(*map(int, sys.argv[1:]))
@@ -0,0 +1,187 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import timeit
+import tracemalloc
+import xml.etree.ElementTree as ET
+from benchmarks.synthetic import default_mix, generate_save_xml
+import gdio.levelStringImporter as lsi
+import gdio.processLevelData as pl
+
+# the whole I/O path, stage by stage: decrypting a save, reading a level out of it, parsing, building objects,
+# compressing, encrypting and writing the save back. every stage reports its best time, objects/s, MB/s (of the
+# data it consumes) and peak memory (from a separate, traced run), and the results can be saved as JSON and compared
+# against a run from another commit.
+# by default the save is synthetic (see benchmarks/synthetic.py) and lives in a temporary directory; --save points
+# the suite at a real CCLocalLevels.dat instead, which is only ever read (the write stage writes to a temporary copy)
+# run from the repository root with: python -m benchmarks.bench_suite [--objects N] [--levels N] [--save PATH]
+#     [--mix key=value ...] [--out results.json] [--compare baseline.json]
+
+
+# (name, function, objects handled, bytes consumed) for every stage; the functions run with stdout swallowed,
+# since read_leveldata and encrypt_gamesave print progress
+def stages(save_path: str, out_path: str) -> tuple[list[tuple], dict[str, str]]:
+    with open(save_path, "rb") as f:
+        save = f.read()
+    xml = lsi.decode_gamesave(save)
+    lvldata = read_quietly(save_path)
+    k4 = ET.fromstring(xml)[0][1][3]
+    k4 = [node.text for node in k4][[node.text for node in k4].index("k4") + 1]
+    lvlstring = lsi.decrypt(k4).decode("utf-8")
+    segments = list(pl.iter_object_strings(lvlstring))
+    pairs = [iter(segment.split(",")) for segment in segments]
+    raw = [{int(key): value for key, value in zip(pair, pair)} for pair in pairs]
+    lvl = pl.extract_level(lvlstring)
+    encoded = lvlstring.encode("utf-8")
+    objects = len(segments)
+    total = sum(count_objects(lsi.decrypt(text).decode("utf-8")) for text in level_strings(xml))
+    return [
+        ("decrypt_gamesave", lambda: lsi.decrypt_gamesave(save_path), total, len(save)),
+        ("read_leveldata", lambda: lsi.read_leveldata(path=save_path), objects, len(save)),
+        ("extract_level", lambda: pl.extract_level(lvlstring), objects, len(encoded)),
+        ("gdObject (extract_object)", lambda: [pl.extract_object(segment) for segment in segments], objects, len(encoded)),
+        ("gdObject (from dict)", lambda: [pl.gdObject(vals) for vals in raw], objects, len(encoded)),
+        ("compress", lambda: lvl.compress(), objects, len(encoded)),
+        ("encrypt", lambda: lsi.encrypt(encoded), objects, len(encoded)),
+        ("encrypt_gamesave", lambda: lsi.encrypt_gamesave(xml, path=out_path), total, len(xml)),
+    ], lvldata
+
+
+def read_quietly(save_path: str) -> dict[str, str]:
+    with contextlib.redirect_stdout(io.StringIO()):
+        return lsi.read_leveldata(path=save_path)
+
+
+# the encrypted k4 of every level in a save's XML
+def level_strings(xml: bytes) -> list[str]:
+    texts = []
+    for node in ET.fromstring(xml)[0][1]:
+        children = [child.text for child in node]
+        if node.tag == "d" and "k4" in children:
+            texts.append(children[children.index("k4") + 1])
+    return texts
+
+
+def count_objects(lvlstring: str) -> int:
+    return sum(1 for _ in pl.iter_object_strings(lvlstring))
+
+
+def measure(func, repeat: int) -> tuple[float, int]:
+    with contextlib.redirect_stdout(io.StringIO()):
+        elapsed = min(timeit.repeat(func, number=1, repeat=repeat))
+        tracemalloc.start()
+        try:
+            baseline = tracemalloc.get_traced_memory()[0]
+            func()
+            peak = tracemalloc.get_traced_memory()[1] - baseline
+        finally:
+            tracemalloc.stop()
+    return elapsed, peak
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_mix(items: list[str]) -> dict[str, float]:
+    mix = {}
+    for item in items:
+        key, _, value = item.partition("=")
+        if key not in default_mix:
+            raise Exception("Unknown mix key ({0}); expected one of {1}".format(key, ", ".join(default_mix)))
+        mix[key] = float(value)
+    return mix
+
+
+def __main__(argv: list[str] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_suite")
+    parser.add_argument("--objects", type=int, default=100000, help="objects per synthetic level")
+    parser.add_argument("--levels", type=int, default=4, help="levels in the synthetic save")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--mix", nargs="*", default=[], metavar="KEY=VALUE", help="synthetic attribute mix overrides")
+    parser.add_argument("--save", help="benchmark a real CCLocalLevels.dat instead of a synthetic one")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--out", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="compare against results saved with --out")
+    args = parser.parse_args(argv)
+
+    directory = tempfile.mkdtemp(prefix="gdio-bench-")
+    cwd = os.getcwd()
+    try:
+        save_path = args.save
+        if save_path == None:
+            save_path = os.path.join(directory, lsi.locallevels)
+            with open(save_path, "wb") as f:
+                xml = generate_save_xml(args.levels, args.objects, args.seed, parse_mix(args.mix))
+                f.write(lsi.encode_gamesave(xml))
+        os.chdir(directory)  # encrypt_gamesave keeps its run counter in the working directory
+        cases, lvldata = stages(save_path, os.path.join(directory, "written.dat"))
+
+        results = {}
+        for name, func, objects, size in cases:
+            elapsed, peak = measure(func, args.repeat)
+            results[name] = {
+                "seconds": elapsed,
+                "objects_per_s": objects / elapsed,
+                "mb_per_s": size / elapsed / 1e6,
+                "peak_memory": peak,
+            }
+    finally:
+        lsi.flush_runs()  # while runs.txt's directory still exists
+        os.chdir(cwd)
+        shutil.rmtree(directory, ignore_errors=True)
+
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": {
+            "save": args.save,
+            "objects": args.objects,
+            "levels": args.levels,
+            "seed": args.seed,
+            "mix": dict(default_mix, **parse_mix(args.mix)),
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    print('save: {0}, level read: "{1}"'.format(args.save or "synthetic", lvldata.get("k2")))
+    print("{0:<28}{1:>10}{2:>14}{3:>10}{4:>12}".format("stage", "time", "objects/s", "MB/s", "peak"), end="")
+    print("{0:>12}".format("vs " + (baseline["commit"] or "baseline")) if baseline else "")
+    for name, result in results.items():
+        print(
+            "{0:<28}{1:>9.3f}s{2:>14,.0f}{3:>10.1f}{4:>10.1f}MB".format(
+                name, result["seconds"], result["objects_per_s"], result["mb_per_s"], result["peak_memory"] / 1e6
+            ),
+            end="",
+        )
+        if baseline and name in baseline["results"]:
+            # > 1 is faster than the baseline
+            print("{0:>11.2f}x".format(baseline["results"][name]["seconds"] / result["seconds"]))
+        else:
+            print()
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    __main__(sys.argv[1:])
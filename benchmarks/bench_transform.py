@@ -0,0 +1,80 @@
+import math
+import sys
+import time
+from benchmarks.synthetic import generate_level_string
+import gdio.processLevelData as pl
+import gdio.columnarLevelData as cl
+
+# bulk transforms through gdLevel.select against the equivalent gdLevel.map callbacks, on both level backends
+# run from the repository root with: python -m benchmarks.bench_transform [objects]
+
+
+def map_translate(lvl: pl.gdLevel) -> None:
+    def func(obj):
+        obj.x = obj.x + 30.0
+        obj.y = obj.y + 15.0
+
+    lvl.map(func)
+
+
+def map_rotate(lvl: pl.gdLevel) -> None:
+    cos, sin = math.cos(math.radians(90)), math.sin(math.radians(90))
+
+    def func(obj):
+        x, y = obj.x - 1000.0, obj.y - 300.0
+        obj.x, obj.y = 1000.0 + x * cos + y * sin, 300.0 - x * sin + y * cos
+        obj.rotation = getattr(obj, "rotation", 0) + 90
+
+    lvl.map(func)
+
+
+def map_scale(lvl: pl.gdLevel) -> None:
+    def func(obj):
+        obj.x, obj.y = 1000.0 + (obj.x - 1000.0) * 2, 300.0 + (obj.y - 300.0) * 2
+        obj.scale = getattr(obj, "scale", 1.0) * 2
+
+    lvl.map(func)
+
+
+def map_mirror(lvl: pl.gdLevel) -> None:
+    def func(obj):
+        obj.x = 2000.0 - obj.x
+        setattr(obj, "flip-horizontal", not getattr(obj, "flip-horizontal", False))
+        obj.rotation = -getattr(obj, "rotation", 0)
+
+    lvl.map(func)
+
+
+def __main__(objects=100000):
+    lvlstring = generate_level_string(objects)
+    cases = [
+        ("translate", map_translate, lambda lvl: lvl.select().translate(30.0, 15.0)),
+        ("rotate_about", map_rotate, lambda lvl: lvl.select().rotate_about(1000.0, 300.0, 90)),
+        ("scale_about", map_scale, lambda lvl: lvl.select().scale_about(1000.0, 300.0, 2)),
+        ("mirror", map_mirror, lambda lvl: lvl.select().mirror(cx=1000.0)),
+    ]
+    print("objects: {0}".format(objects))
+    print(
+        "{0:<14}{1:>10}{2:>10}{3:>16}{4:>16}{5:>20}".format(
+            "transform", "map", "select", "columnar map", "columnar select", "select, index live"
+        )
+    )
+    for name, mapped, selected in cases:
+        timings = []
+        for extract, func, index in [
+            (pl.extract_level, mapped, False),
+            (pl.extract_level, selected, False),
+            (cl.extract_columnar_level, mapped, False),
+            (cl.extract_columnar_level, selected, False),
+            (pl.extract_level, selected, True),
+        ]:
+            lvl = extract(lvlstring)
+            if index:
+                lvl.spatial_index()
+            start = time.perf_counter()
+            func(lvl)
+            timings.append(time.perf_counter() - start)
+        print("{0:<14}{1:>9.2f}s{2:>9.2f}s{3:>15.2f}s{4:>15.2f}s{5:>19.2f}s".format(name, *timings))
+
+if __name__ == "__main__":
+    __main__(*map(int, sys.argv[1:]))
@@ -0,0 +1,93 @@
+import base64 as b64
+import random
+
+# generators for synthetic level strings, so the I/O path can be measured without a real GD install.
+# the output mimics what the game writes: a color section, the kA headers, then one segment per object.
+
+# the default attribute mix, loosely following a decorated level: the share of objects that are triggers or text
+# objects (the rest are blocks/decoration), and how often blocks get groups or an HSV shift and triggers get groups
+default_mix = {"triggers": 0.18, "text": 0.02, "groups": 0.3, "hsv": 0.1, "trigger-groups": 0.5}
+
+level_headers = ",kA13,0,kA15,0,kA16,0,kA14,,kA6,0,kA7,0,kA17,0,kA18,0,kS39,0,kA2,0,kA3,0,kA8,0,kA4,0,kA9,0,kA10,0,kA11,0;"
+
+
+# a single color channel, in the underscore-separated format used by kS38
+def generate_color_string(channel: int, rng: random.Random) -> str:
+    return "1_{0}_2_{1}_3_{2}_11_255_12_255_13_255_4_-1_6_{3}_7_1_15_1_18_0_8_1".format(
+        rng.randrange(256), rng.randrange(256), rng.randrange(256), channel
+    )
+
+
+# a single object, drawn from the given attribute mix (see default_mix; missing keys take their default)
+def generate_object_string(rng: random.Random, mix: dict[str, float] = None) -> str:
+    mix = default_mix if mix == None else dict(default_mix, **mix)
+    x = rng.randrange(0, 300000) / 2 if rng.random() < 0.3 else rng.randrange(0, 10000) * 15
+    y = rng.randrange(0, 200) * 15
+    roll = rng.random()
+    if roll < 1 - mix["triggers"] - mix["text"]:  # decoration/blocks
+        attrs = [(1, rng.choice([1, 8, 207, 211, 1705])), (2, x), (3, y)]
+        if rng.random() < 0.3:
+            attrs.append((6, rng.choice([90, 180, 270])))
+        if rng.random() < 0.4:
+            attrs.append((21, rng.randrange(1, 100)))
+        if rng.random() < 0.2:
+            attrs.append((24, rng.choice([-3, -1, 1, 3, 5])))
+        if rng.random() < mix["groups"]:
+            attrs.append((57, ".".join(str(rng.randrange(1, 999)) for _ in range(rng.randrange(1, 4)))))
+        if rng.random() < mix["hsv"]:
+            attrs += [(41, 1), (43, "{0}a1a0.5a0a0".format(rng.randrange(-180, 180)))]
+        if rng.random() < 0.1:
+            attrs.append((32, rng.choice([0.5, 1.5, 2])))
+    elif roll < 1 - mix["text"]:  # move/color/pulse triggers
+        trigger = rng.choice([901, 899, 1006])
+        attrs = [(1, trigger), (2, x), (3, y), (36, 1)]
+        if trigger == 901:
+            attrs += [(28, rng.randrange(-300, 300)), (29, rng.randrange(-300, 300)), (10, 0.5), (30, 2)]
+            attrs.append((51, rng.randrange(1, 999)))
+        elif trigger == 899:
+            attrs += [(7, 255), (8, 0), (9, 255), (10, 1), (23, rng.randrange(1, 100))]
+        else:
+            attrs += [(45, 0.1), (46, 0.2), (47, 0.5), (48, 1), (49, "0a1a1a0a0")]
+            attrs.append((51, rng.randrange(1, 999)))
+        if rng.random() < 0.5:
+            attrs.append((11, 1))
+        if rng.random() < mix["trigger-groups"]:
+            attrs.append((57, str(rng.randrange(1, 999))))
+    else:  # text objects
+        text = rng.choice(["hello", "How to Disappear", "gd-io", "layout by lcd"])
+        attrs = [(1, 914), (2, x), (3, y), (31, b64.b64encode(text.encode()).decode())]
+
+    return ",".join("{0},{1}".format(key, value) for key, value in attrs)
+
+
+# a full level string with the given number of objects and color channels
+def generate_level_string(objects: int, colors: int = 12, seed: int = 0, mix: dict[str, float] = None) -> str:
+    rng = random.Random(seed)
+    channels = list(range(1, colors - 3)) + [1000, 1001, 1002, 1004][: min(colors, 4)]
+    return (
+        "kS38,"
+        + "|".join(generate_color_string(channel, rng) for channel in channels)
+        + "|"
+        + level_headers
+        + "".join(generate_object_string(rng, mix) + ";" for _ in range(objects))
+    )
+
+
+# a save file's XML (what decrypt_gamesave returns) holding the given number of levels, named "level <n>"
+def generate_save_xml(levels: int = 1, objects: int = 1000, seed: int = 0, mix: dict[str, float] = None) -> bytes:
+    import gdio.levelStringImporter as lsi
+
+    entries = []
+    for i in range(levels):
+        lvlstring = generate_level_string(objects, seed=seed + i, mix=mix)
+        entries.append(
+            "<k>k_{0}</k><d><k>kCEK</k><i>4</i><k>k1</k><i>{1}</i><k>k2</k><s>level {0}</s>"
+            "<k>k4</k><s>{2}</s><k>k5</k><s>gdio</s><k>k13</k><t /><k>k21</k><i>2</i></d>".format(
+                i, 100000 + i, lsi.encrypt(lvlstring.encode())
+            )
+        )
+    return (
+        '<?xml version="1.0"?><plist version="1.0" gjver="2.0"><dict><k>LLM_01</k><d><k>_isArr</k><t />'
+        + "".join(entries)
+        + "</d><k>LLM_02</k><i>35</i></dict></plist>"
+    ).encode()
@@ -1,4 +1,8 @@
 import base64 as b64
+import types
+import typing
+from types import MappingProxyType
+from typing import Any, Callable, NamedTuple
 import gdio.objectAttributeTransformation as attr_delta
 
 # representing a singular attribute of a GD object (with designated type restrictions)
@@ -114,4 +118,43 @@ obj_attr_transform = {
 # decode is for transforming levelstring -> color, encode is for transforming color -> levelstring
 col_attr_transform = {
     10: {"decode": lambda string: attr_delta.decode_hsv(string), "encode": lambda array: attr_delta.encode_hsv(array)},
-}
\ No newline at end of file
+}
+
+
+# compiled form of a single attribute: everything needed to decode/encode a value, resolved once at import
+# cast is the constructor for the attribute type (the origin for aliases like list[int]), args its type arguments
+class gdAttributeCodec(NamedTuple):
+    key: int
+    name: str
+    type: type
+    cast: Callable[[Any], Any]
+    args: tuple
+    decode: Callable[[str], Any] | None
+    encode: Callable[[Any], str] | None
+
+
+def compile_attr_registry(
+    attr_map: dict[int, gdAttribute], attr_transform: dict[int, dict[str, Callable]]
+) -> tuple[MappingProxyType, MappingProxyType, MappingProxyType]:
+    codecs = {}
+    for key, attr in attr_map.items():
+        aliased = type(attr.type) == types.GenericAlias
+        codecs[key] = gdAttributeCodec(
+            key,
+            attr.name,
+            attr.type,
+            attr.type.__origin__ if aliased else attr.type,
+            typing.get_args(attr.type) if aliased else (),
+            attr_transform[key]["decode"] if key in attr_transform else None,
+            attr_transform[key]["encode"] if key in attr_transform else None,
+        )
+    return (
+        MappingProxyType({attr.name: key for key, attr in attr_map.items()}),  # name -> ID
+        MappingProxyType(codecs),  # ID -> codec
+        MappingProxyType({str(key): key for key in attr_map}),  # ID as written in a level string -> ID
+    )
+
+
+# immutable lookup tables built from the maps above; use these instead of scanning obj_attr_map/col_attr_map
+obj_attr_ids, obj_attr_codecs, obj_attr_keys = compile_attr_registry(obj_attr_map, obj_attr_transform)
+col_attr_ids, col_attr_codecs, col_attr_keys = compile_attr_registry(col_attr_map, col_attr_transform)
@@ -0,0 +1,63 @@
+from typing import Any, Iterable
+from gdio.spatialIndex import position_key
+
+# an inverted index from attribute values to the objects holding them, e.g. group ID -> objects in that group.
+# list attributes (like groups) file an object under every value in the list. like gdSpatialIndex, it is kept up to
+# date by the gdLevel holding it (see gdLevel.attribute_index); note that editing a list attribute in place
+# (obj.groups.append(4)) isn't seen by the level, so assign the new list instead (obj.groups = obj.groups + [4]).
+
+
+class gdAttributeIndex:
+    def __init__(self, names: tuple[str, ...], objs: Iterable[Any] = ()) -> None:
+        self.names = names  # the attributes whose values the objects are filed under
+        self.reset(objs)
+
+    def __len__(self) -> int:
+        return len(self.keys_of)
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self.objects
+
+    def reset(self, objs: Iterable[Any] = ()) -> None:
+        self.objects: dict[Any, set] = {}  # value -> objects
+        self.keys_of: dict[Any, tuple] = {}  # object -> values it is filed under
+        for obj in objs:
+            self.add(obj)
+
+    # the values an object is filed under
+    def keys(self, obj: Any) -> tuple:
+        keys = []
+        for name in self.names:
+            value = getattr(obj, name, None)
+            if type(value) in (list, tuple, set):
+                keys.extend(value)
+            elif value != None:
+                keys.append(value)
+        return tuple(dict.fromkeys(keys))
+
+    def add(self, obj: Any) -> None:
+        if obj in self.keys_of:
+            return
+        keys = self.keys(obj)
+        self.keys_of[obj] = keys
+        for key in keys:
+            self.objects.setdefault(key, set()).add(obj)
+
+    def remove(self, obj: Any) -> None:
+        if obj not in self.keys_of:
+            return
+        for key in self.keys_of.pop(obj):
+            objs = self.objects[key]
+            objs.discard(obj)
+            if not objs:
+                del self.objects[key]
+
+    # called when an attribute of an indexed object changed
+    def update(self, obj: Any, name: str) -> None:
+        if name in self.names and obj in self.keys_of:
+            self.remove(obj)
+            self.add(obj)
+
+    # the objects filed under a value, in (x, y, ID) order
+    def lookup(self, key: Any) -> list[Any]:
+        return sorted(self.objects.get(key, ()), key=position_key)
@@ -0,0 +1,276 @@
+import argparse
+import glob
+import hashlib
+import importlib
+import importlib.util
+import json
+import os
+import sys
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable
+import gdio.levelStringImporter as lsi
+import gdio.processLevelData as pl
+
+# running the same script over many levels without the game: every input file (a level string, e.g. from
+# write_levelstring_to_file, or a whole save file like CCLocalLevels.dat) is parsed, passed level by level to the
+# script's transform function, and written to the output directory under the same relative path. files are handled in
+# a pool of worker processes, each writing its own output as soon as it's done, and a manifest in the output directory
+# remembers what every input hashed to, so inputs (and scripts) that haven't changed since the last run are skipped.
+# run with: python batch.py script.py levels/ -o out/   (see python batch.py --help)
+#
+# the script is a .py file or a module name, optionally followed by :function (transform by default); the function
+# gets each gdLevel and edits it in place, or returns a new gdLevel to write instead
+
+manifest_name = ".gdio-batch.json"
+level_extensions = (".txt", ".dat")
+
+
+# the files matched by the given directories, files and glob patterns, in a stable order
+def find_inputs(patterns: list[str]) -> list[str]:
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for directory, _, files in os.walk(pattern):
+                paths += [os.path.join(directory, name) for name in files if name.endswith(level_extensions)]
+        elif os.path.isfile(pattern):
+            paths.append(pattern)
+        else:
+            paths += [path for path in glob.glob(pattern, recursive=True) if os.path.isfile(path)]
+    return sorted(dict.fromkeys(os.path.abspath(path) for path in paths))
+
+
+# (file or module, function name) of a script spec ("script.py", "script.py:func", "package.module:func")
+def split_spec(spec: str) -> tuple[str, str]:
+    drive, rest = os.path.splitdrive(spec)
+    target, separator, name = rest.rpartition(":")
+    if not separator:
+        return spec, "transform"
+    return drive + target, name or "transform"
+
+
+# the function named by a script spec
+def load_script(spec: str) -> Callable[[pl.gdLevel], pl.gdLevel | None]:
+    target, name = split_spec(spec)
+    if target.endswith(".py"):
+        module_spec = importlib.util.spec_from_file_location("gdio_batch_script", target)
+        module = importlib.util.module_from_spec(module_spec)
+        module_spec.loader.exec_module(module)
+    else:
+        module = importlib.import_module(target)
+    if not callable(getattr(module, name, None)):
+        raise Exception("Provided script ({0}) has no function named {1}".format(target, name))
+    return getattr(module, name)
+
+
+# the file holding a script spec's source, or None if there's no such file or module
+def script_file(spec: str) -> str | None:
+    target = split_spec(spec)[0]
+    if not target.endswith(".py"):
+        try:
+            module_spec = importlib.util.find_spec(target)
+        except (ImportError, ValueError):  # e.g. a package that doesn't exist, or an empty name
+            module_spec = None
+        target = None if module_spec == None else module_spec.origin
+    return target if target != None and os.path.isfile(target) else None
+
+
+# a hash of the script's source, so changing the script reruns everything
+def script_hash(spec: str) -> str:
+    target = script_file(spec)
+    if target == None:
+        raise Exception("Provided script ({0}) is neither a file nor a module".format(split_spec(spec)[0]))
+    with open(target, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# the script loaded in this process, by spec (each worker loads it once)
+loaded_scripts: dict[str, Callable] = {}
+
+
+# run the script over one input file and write the result to output; returns what went through it
+def process_file(spec: str, path: str, output: str, lazy: bool = False, level: int = 9) -> dict[str, Any]:
+    started = time.perf_counter()
+    if spec not in loaded_scripts:
+        loaded_scripts[spec] = load_script(spec)
+    transform = loaded_scripts[spec]
+    with open(path, "rb") as f:
+        data = f.read()
+
+    objects = 0
+    text = data.decode("utf-8", "replace").strip()
+    if text.startswith("kS38,"):  # a level string
+        lvl = run_script(transform, pl.extract_level(text, lazy))
+        objects += len(lvl.objs)
+        result = lvl.compress().encode("utf-8")
+    else:  # a save file
+        try:
+            root = lsi.parse_xml(lsi.decode_gamesave(data))
+        except (ValueError, zlib.error):
+            raise Exception("Provided file is neither a level string nor a save file")
+        nodes = list(root[0][1])
+        for node in nodes[1::2]:
+            if node.tag != "d":
+                continue
+            saved = lsi.gdSavedLevel(node)
+            if "k4" not in saved.values:  # empty level
+                continue
+            saved.level = run_script(transform, pl.extract_level(saved.lvlstring, lazy))
+            objects += len(saved.level.objs)
+            saved.encode(level)
+        result = lsi.encode_gamesave(lsi.serialize_xml(root))
+
+    write_atomically(output, result)
+    return {
+        "objects": objects,
+        "bytes_in": len(data),
+        "bytes_out": len(result),
+        "seconds": time.perf_counter() - started,
+    }
+
+
+def run_script(transform: Callable, lvl: pl.gdLevel) -> pl.gdLevel:
+    result = transform(lvl)
+    return lvl if result == None else result
+
+
+# written under a temporary name first, so an interrupted run never leaves half a file behind
+def write_atomically(path: str, data: bytes) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    lsi.write_atomically(path, data)
+
+
+# the output path of every input: its path relative to the deepest directory holding all of them
+def output_paths(inputs: list[str], output_dir: str) -> dict[str, str]:
+    if not inputs:
+        return {}
+    base = os.path.commonpath([os.path.dirname(path) for path in inputs])
+    return {path: os.path.join(output_dir, os.path.relpath(path, base)) for path in inputs}
+
+
+def load_manifest(output_dir: str) -> dict[str, Any]:
+    try:
+        with open(os.path.join(output_dir, manifest_name)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(output_dir: str, manifest: dict[str, Any]) -> None:
+    write_atomically(os.path.join(output_dir, manifest_name), json.dumps(manifest, indent=1).encode())
+
+
+# process every input whose content (or the script) changed since the last run into output_dir, using up to workers
+# processes (None for one per core); returns the totals printed by print_summary
+def run_batch(
+    spec: str,
+    inputs: list[str],
+    output_dir: str,
+    workers: int | None = None,
+    force: bool = False,
+    lazy: bool = False,
+    level: int = 9,
+) -> dict[str, Any]:
+    started = time.perf_counter()
+    outputs = output_paths(inputs, output_dir)
+    manifest = load_manifest(output_dir)
+    script = script_hash(spec)
+    totals = {"processed": 0, "skipped": 0, "failed": 0, "objects": 0, "bytes_in": 0, "bytes_out": 0}
+
+    pending = {}
+    for path in inputs:
+        key = script + "-" + file_hash(path)
+        if not force and manifest.get(path) == key and os.path.exists(outputs[path]):
+            totals["skipped"] += 1
+        else:
+            pending[path] = key
+
+    def finish(path: str, stats: dict[str, Any] | None, error: Exception | None) -> None:
+        if error != None:
+            totals["failed"] += 1
+            print("Failed: {0} ({1}: {2})".format(path, type(error).__name__, error))
+            return
+        manifest[path] = pending[path]
+        totals["processed"] += 1
+        for key in ("objects", "bytes_in", "bytes_out"):
+            totals[key] += stats[key]
+        print("{0} -> {1} ({2} objects, {3:.2f}s)".format(path, outputs[path], stats["objects"], stats["seconds"]))
+
+    try:
+        workers = min(workers or os.cpu_count() or 1, len(pending))
+        if workers <= 1:  # no point starting a pool
+            for path in pending:
+                try:
+                    stats = process_file(spec, path, outputs[path], lazy, level)
+                except Exception as error:
+                    finish(path, None, error)
+                else:
+                    finish(path, stats, None)
+        else:
+            with ProcessPoolExecutor(workers) as pool:
+                futures = {
+                    pool.submit(process_file, spec, path, outputs[path], lazy, level): path for path in pending
+                }
+                for future in as_completed(futures):
+                    error = future.exception()
+                    finish(futures[future], None if error != None else future.result(), error)
+    finally:  # keep what was done, even if the run was interrupted
+        os.makedirs(output_dir, exist_ok=True)
+        save_manifest(output_dir, manifest)
+
+    totals["seconds"] = time.perf_counter() - started
+    return totals
+
+
+def print_summary(totals: dict[str, Any]) -> None:
+    seconds = totals["seconds"] or 1e-9
+    print(
+        "{processed} processed, {skipped} skipped (unchanged), {failed} failed in {seconds:.2f}s".format(**totals)
+    )
+    print(
+        "{0:.2f} files/s, {1:,.0f} objects/s, {2:.2f} MB/s in, {3:.2f} MB/s out".format(
+            totals["processed"] / seconds,
+            totals["objects"] / seconds,
+            totals["bytes_in"] / seconds / 1e6,
+            totals["bytes_out"] / seconds / 1e6,
+        )
+    )
+
+
+def __main__(argv: list[str] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python batch.py", description="Run a script over many level strings or save files."
+    )
+    parser.add_argument("script", help="a .py file or module name, optionally followed by :function (transform)")
+    parser.add_argument("inputs", nargs="+", help="directories, files or glob patterns of .txt level strings/.dat saves")
+    parser.add_argument("-o", "--output", required=True, help="directory to write the results to")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="worker processes (default: one per core)")
+    parser.add_argument("--force", action="store_true", help="process every input, even if it hasn't changed")
+    parser.add_argument("--lazy", action="store_true", help="parse levels with lazy objects (see gdLazyObject)")
+    parser.add_argument("--level", type=int, default=9, help="gzip compression level for levels in save files")
+    args = parser.parse_args(argv)
+    if script_file(args.script) == None:
+        parser.error("script {0} is neither a file nor a module".format(split_spec(args.script)[0]))
+
+    output = os.path.abspath(args.output) + os.sep
+    inputs = [path for path in find_inputs(args.inputs) if not path.startswith(output)]  # not last run's results
+    if not inputs:
+        print("No input files found")
+        sys.exit(1)
+    totals = run_batch(args.script, inputs, args.output, args.workers, args.force, args.lazy, args.level)
+    print_summary(totals)
+    if totals["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    __main__(sys.argv[1:])
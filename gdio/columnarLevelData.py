@@ -0,0 +1,433 @@
+from array import array
+from collections.abc import MutableSequence
+import itertools
+from typing import Callable, Any, Iterable, Iterator
+from gdio.attributeData import obj_attr_codecs, obj_attr_ids
+from gdio.pipelineProfiler import stage
+from gdio.processLevelData import (
+    gdObject,
+    gdColor,
+    gdLevel,
+    gdSelection,
+    iter_objects,
+    extract_colors,
+    extract_headers,
+    detached_object,
+    adjusted,
+    adjust,
+)
+
+# an alternative, column-wise backend for gdLevel.
+# instead of every object carrying its own __dict__, the attributes almost every object has live in typed arrays
+# (one entry per object), and everything else lives in a sparse side table keyed by row. objects handed out by the
+# level are lightweight views that read and write through to the columns, so scripts written against gdObject
+# (getattr/setattr/delattr, map, objs_printable, compress) keep working unchanged.
+# note: views always emit column attributes first (in attribute ID order) followed by the rest, so the attribute
+# order of a compressed object may differ from the order it was read in.
+
+# attributes stored in columns; a value only goes into its column if it has exactly the declared type, anything
+# else (e.g. a float rotation, or an int x set by hand) goes into the side table so it round-trips unchanged
+column_attrs = ("ID", "x", "y", "rotation", "scale", "color", "z-layer")
+column_types = tuple(obj_attr_codecs[obj_attr_ids[name]].type for name in column_attrs)
+column_bits = {name: 1 << i for i, name in enumerate(column_attrs)}
+
+# typecodes for the columns; floats are stored as doubles so values (and their str()) are preserved exactly
+typecodes = {int: "i", float: "d"}
+
+
+row_ids = itertools.count()  # what views hash by, since a view's row number changes when its store is compacted
+
+# removed objects a level's store holds before it's worth compacting (on top of half as many as the level has)
+compact_minimum = 1024
+
+
+# column storage for the objects of a level; a row never holds another object, so a view stays valid for the store's
+# lifetime. once compacted, a store forwards views of the rows it kept to the new store (see compact)
+class gdObjectStore:
+    def __init__(self) -> None:
+        self.columns = {name: array(typecodes[column_types[i]]) for i, name in enumerate(column_attrs)}
+        self.present = array("B")  # bitmask per row of which columns hold a value
+        self.ids = array("q")  # per row, see row_ids
+        self.extra: dict[int, dict[str, Any]] = {}  # row -> attributes that don't live in a column
+        self.owner: gdLevel | None = None  # the level told about changes made through views
+        self.moved: tuple[gdObjectStore, array] | None = None  # the store compacted into, and old row -> new row
+
+    def __len__(self) -> int:
+        return len(self.present)
+
+    # add an object's attributes as a new row, returning the row number
+    def append(self, attrs: dict[str, Any]) -> int:
+        row = len(self.present)
+        mask = 0
+        for i, name in enumerate(column_attrs):
+            column = self.columns[name]
+            if name in attrs and type(attrs[name]) == column_types[i]:
+                try:
+                    column.append(attrs[name])
+                    mask |= 1 << i
+                    continue
+                except OverflowError:
+                    pass
+            column.append(0)
+        self.present.append(mask)
+        self.ids.append(next(row_ids))
+
+        extra = {key: value for key, value in attrs.items() if not mask & column_bits.get(key, 0)}
+        if extra:
+            self.extra[row] = extra
+        return row
+
+    def get(self, row: int, name: str) -> Any:
+        if self.present[row] & column_bits.get(name, 0):
+            return self.columns[name][row]
+        if row in self.extra and name in self.extra[row]:
+            return self.extra[row][name]
+        raise AttributeError(name)
+
+    def set(self, row: int, name: str, value: Any) -> None:
+        bit = column_bits.get(name, 0)
+        if bit and type(value) == column_types[column_attrs.index(name)]:
+            try:
+                self.columns[name][row] = value
+            except OverflowError:
+                pass
+            else:
+                self.present[row] |= bit
+                if row in self.extra:
+                    self.extra[row].pop(name, None)
+                return
+        self.present[row] &= ~bit
+        self.extra.setdefault(row, {})[name] = value
+
+    def delete(self, row: int, name: str) -> None:
+        bit = column_bits.get(name, 0)
+        if self.present[row] & bit:
+            self.present[row] &= ~bit
+        elif row in self.extra and name in self.extra[row]:
+            del self.extra[row][name]
+        else:
+            raise AttributeError(name)
+
+    # all attributes of a row, column attributes first
+    def attributes(self, row: int) -> dict[str, Any]:
+        mask = self.present[row]
+        attrs = {name: self.columns[name][row] for name in column_attrs if mask & column_bits[name]}
+        if row in self.extra:
+            attrs.update(self.extra[row])
+        return attrs
+
+    # a new store holding just the given rows (in that order, each once) and where each row went (-1 for the rest).
+    # the new store takes over this one's owner, and views of the rows that went along move over to it as they're
+    # used; the other rows stay behind for any views of removed objects that are still around
+    def compact(self, rows: Iterable[int]) -> tuple["gdObjectStore", array]:
+        remap = array("l", [-1]) * len(self)
+        order = array("l")
+        for row in rows:
+            if remap[row] == -1:
+                remap[row] = len(order)
+                order.append(row)
+        store = gdObjectStore()
+        for name, column in self.columns.items():
+            store.columns[name] = array(column.typecode, map(column.__getitem__, order))
+        store.present = array("B", map(self.present.__getitem__, order))
+        store.ids = array("q", map(self.ids.__getitem__, order))
+        store.extra = {remap[row]: self.extra.pop(row) for row in list(self.extra) if remap[row] != -1}
+        store.owner, self.owner = self.owner, None
+        self.moved = (store, remap)
+        return store, remap
+
+    # sort keys matching gdLevel's (x, y, ID) ordering for every row, read straight from the columns where possible
+    def position_keys(self) -> list[tuple]:
+        keys = list(zip(self.columns["x"], self.columns["y"], self.columns["ID"]))
+        full = column_bits["x"] | column_bits["y"] | column_bits["ID"]
+        for row, mask in enumerate(self.present):
+            if mask & full != full:
+                attrs = self.attributes(row)
+                keys[row] = (attrs.get("x", gdObject.x), attrs.get("y", gdObject.y), attrs.get("ID", gdObject.ID))
+        return keys
+
+
+# a gdObject that reads and writes through to a row of a gdObjectStore
+class gdObjectView(gdObject):
+    __slots__ = ("_store", "_row")
+
+    def __init__(self, store: gdObjectStore, row: int) -> None:
+        object.__setattr__(self, "_store", store)
+        object.__setattr__(self, "_row", row)
+
+    def __getattr__(self, name: str) -> Any:
+        if name in gdObjectView.__slots__:  # not set up yet (e.g. mid-copy); don't recurse through _store
+            raise AttributeError(name)
+        if self._store.moved != None:
+            self.relocate()
+        return self._store.get(self._row, name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if self._store.moved != None:
+            self.relocate()
+        self._store.set(self._row, name, value)
+        if self._store.owner != None:
+            self._store.owner.object_changed(self, name)
+
+    def __delattr__(self, name: str) -> None:
+        if self._store.moved != None:
+            self.relocate()
+        self._store.delete(self._row, name)
+        if self._store.owner != None:
+            self._store.owner.object_changed(self, name)
+
+    # follow the row to the store it was compacted into, if it went along (see gdObjectStore.compact)
+    def relocate(self) -> None:
+        store, row = self._store, self._row
+        while store.moved != None and store.moved[1][row] != -1:
+            store, row = store.moved[0], store.moved[1][row]
+        object.__setattr__(self, "_store", store)
+        object.__setattr__(self, "_row", row)
+
+    def attributes(self) -> dict[str, Any]:
+        if self._store.moved != None:
+            self.relocate()
+        return self._store.attributes(self._row)
+
+    # views have no attributes of their own, so __dict__ presents the row too (for scripts that read it directly)
+    @property
+    def __dict__(self) -> dict[str, Any]:
+        return self.attributes()
+
+    def __eq__(self, other: object) -> bool:
+        if type(other) == gdObjectView:
+            self.relocate()
+            other.relocate()
+            return self._store is other._store and self._row == other._row
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        if self._store.moved != None:
+            self.relocate()
+        return hash(self._store.ids[self._row])
+
+    # copying or pickling a view gives a plain gdObject detached from the store
+    def __reduce__(self) -> tuple:
+        return (detached_object, (self.attributes(),))
+
+
+# column attributes shadow gdObject's class-level defaults (ID/x/y), so they need explicit accessors
+# that fall back to those defaults the same way a plain gdObject does
+def column_property(name: str) -> property:
+    def getter(self: gdObjectView) -> Any:
+        if self._store.moved != None:
+            self.relocate()
+        try:
+            return self._store.get(self._row, name)
+        except AttributeError:
+            if name in vars(gdObject):
+                return vars(gdObject)[name]
+            raise
+
+    return property(getter)
+
+
+for name in column_attrs:
+    setattr(gdObjectView, name, column_property(name))
+
+
+# the objs list of a gdColumnarLevel; behaves like a list of gdObjects but only holds row numbers.
+# adding a view of the list's own store adds its row, adding anything else copies its attributes into the store;
+# removing an object just drops its row number. the store's owner (if any) is told about the views added and removed
+class gdColumnarObjectList(MutableSequence):
+    def __init__(self, store: gdObjectStore, objs: Iterable[gdObject] = ()) -> None:
+        self.store = store
+        self.rows = array("l", map(self.row_of, objs))
+
+    # the row holding obj, putting it into the store first unless it's already there
+    def row_of(self, obj: gdObject) -> int:
+        if type(obj) == gdObjectView:
+            obj.relocate()
+            if obj._store is self.store:
+                return obj._row
+        return self.store.append(obj.attributes())
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __getitem__(self, index: int | slice) -> gdObjectView | list[gdObjectView]:
+        if type(index) == slice:
+            return [gdObjectView(self.store, row) for row in self.rows[index]]
+        return gdObjectView(self.store, self.rows[index])
+
+    def __setitem__(self, index: int | slice, obj: gdObject | Iterable[gdObject]) -> None:
+        if type(index) == slice:
+            old = self[index]
+            rows = array("l", map(self.row_of, obj))
+            self.rows[index] = rows
+        else:
+            old = [self[index]]
+            rows = [self.row_of(obj)]
+            self.rows[index] = rows[0]
+        self.notify(old, rows)
+
+    def __delitem__(self, index: int | slice) -> None:
+        old = self[index] if type(index) == slice else [self[index]]
+        del self.rows[index]
+        self.notify(old, ())
+
+    def __iter__(self) -> Iterator[gdObjectView]:
+        store = self.store
+        for row in self.rows:
+            yield gdObjectView(store, row)
+
+    def insert(self, index: int, obj: gdObject) -> None:
+        row = self.row_of(obj)
+        self.rows.insert(index, row)
+        self.notify((), [row])
+
+    # remove all of objs (views into this list's store) in a single pass
+    def remove_all(self, objs: Iterable[gdObject]) -> None:
+        views = [obj for obj in objs if type(obj) == gdObjectView]
+        for view in views:
+            view.relocate()
+        doomed = {view._row for view in views if view._store is self.store}
+        old = [gdObjectView(self.store, row) for row in self.rows if row in doomed]
+        self.rows = array("l", [row for row in self.rows if row not in doomed])
+        self.notify(old, ())
+
+    def notify(self, removed: list[gdObjectView], added: Iterable[int]) -> None:
+        owner = self.store.owner
+        if owner != None:
+            if removed:
+                owner.objects_removed(removed)
+            views = [gdObjectView(self.store, row) for row in added]
+            if views:
+                owner.objects_added(views)
+            if removed and owner.objs is self:
+                owner.compact()
+
+    def reverse(self) -> None:
+        self.rows.reverse()
+
+    def sort(self, key: Callable[[gdObject], Any] = None, reverse: bool = False) -> None:
+        if key == None:
+            raise TypeError("gdObjects are not orderable; provide a key")
+        store = self.store
+        self.rows = array("l", sorted(self.rows, key=lambda row: key(gdObjectView(store, row)), reverse=reverse))
+
+    # the (x, y, ID) order gdLevel keeps its objects in, without going through views
+    def sort_by_position(self) -> None:
+        self.rows = array("l", sorted(self.rows, key=self.store.position_keys().__getitem__))
+
+
+# a gdLevel whose objects are held column-wise in a gdObjectStore
+class gdColumnarLevel(gdLevel):
+    def __init__(self, objs: Iterable[gdObject], cols: list[gdColor], headers: str) -> None:
+        self.indexes: list[Any] = []
+        self.colors_by_id: dict[int, gdColor] | None = None
+        self.store = gdObjectStore()
+        self.store.owner = self
+        self._objs = gdColumnarObjectList(self.store, objs)
+        self.sort_objs()
+        self.cols = cols
+        self.cols.sort(key=lambda col: col.ID)
+        self.headers = headers
+
+    # the level's objects, held in the level's store; assigning copies in the objects that aren't in it already
+    @property
+    def objs(self) -> gdColumnarObjectList:
+        return self._objs
+
+    @objs.setter
+    def objs(self, objs: Iterable[gdObject]) -> None:
+        self._objs = gdColumnarObjectList(self.store, objs)
+        if not self.compact():
+            for index in self.indexes:
+                index.reset(self._objs)
+
+    # once removed objects take up a good part of the store, move the level's objects into a store of their own
+    # (see gdObjectStore.compact), rebuilding the indexes on it. returns whether it did
+    def compact(self, force: bool = False) -> bool:
+        objs = self._objs
+        if not force and len(self.store) - len(objs.rows) <= max(len(objs.rows) // 2, compact_minimum):
+            return False
+        self.store, remap = self.store.compact(objs.rows)
+        objs.store = self.store
+        objs.rows = array("l", map(remap.__getitem__, objs.rows))
+        for index in self.indexes:
+            index.reset(objs)
+        return True
+
+    # views report changes through the store rather than per object, so there is nothing to watch
+    def watch(self, objs: Iterable[gdObject]) -> None:
+        pass
+
+    def unwatch(self, objs: Iterable[gdObject]) -> None:
+        pass
+
+    def select(self, filter: Callable[[gdObject], bool] = None) -> "gdColumnarSelection":
+        store = self.store
+        return gdColumnarSelection(
+            store, [row for row in self.objs.rows if filter == None or filter(gdObjectView(store, row))]
+        )
+
+    # sorted straight from the columns every time; views are made on the fly, so there are no objects to keep track of
+    def sort_objs(self, track: bool = False) -> None:
+        with stage("sort objects") as timing:
+            self.objs.sort_by_position()
+            timing.count(objects=len(self.objs))
+
+
+# a gdSelection over rows of a store, transformed by working on the store's columns directly rather than through views
+class gdColumnarSelection(gdSelection):
+    def __init__(self, store: gdObjectStore, rows: list[int]) -> None:
+        self.store = store
+        self.rows = rows
+
+    @property
+    def objs(self) -> list[gdObjectView]:
+        return [gdObjectView(self.store, row) for row in self.rows]
+
+    def transform(
+        self, move: Callable[[float, float], tuple[float, float]], adjustments: list[tuple[str, Any, Callable]] = ()
+    ) -> "gdColumnarSelection":
+        if self.store.moved != None:  # the level was compacted since; the views know where their rows went
+            return gdSelection.transform(self, move, adjustments)
+        store, columns, present = self.store, self.store.columns, self.store.present
+        xs, ys = columns["x"], columns["y"]
+        for row in self.rows:
+            # rows whose position lives in the columns (the usual case) are written to directly
+            if present[row] & position_bits != position_bits:
+                view = gdObjectView(store, row)
+                for name, value in adjusted(view.attributes(), move, adjustments).items():
+                    store.set(row, name, value)
+                continue
+            x, y = move(xs[row], ys[row])
+            xs[row] = float(x)
+            ys[row] = float(y)
+            for name, default, func in adjustments:
+                if present[row] & column_bits.get(name, 0):
+                    value = adjust(name, columns[name][row], default, func)
+                else:
+                    value = adjust(name, store.extra.get(row, {}).get(name), default, func)
+                if value != None:
+                    store.set(row, name, value)
+        if store.owner != None and store.owner.indexes:
+            names = ["x", "y"] + [name for name, default, func in adjustments]
+            for row in self.rows:
+                for name in names:
+                    store.owner.object_changed(gdObjectView(store, row), name)
+        return self
+
+
+position_bits = column_bits["x"] | column_bits["y"]
+
+
+# convert level string to a column-wise level object; objects are decoded one at a time straight into the store
+def extract_columnar_level(lvlstring: str) -> gdColumnarLevel:
+    return gdColumnarLevel(
+        iter_objects(lvlstring),
+        extract_colors(lvlstring),
+        extract_headers(lvlstring),
+    )
+
+
+# convert an existing level object to its column-wise counterpart
+def to_columnar_level(lvl: gdLevel) -> gdColumnarLevel:
+    return gdColumnarLevel(lvl.objs, lvl.cols, lvl.headers)
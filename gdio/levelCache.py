@@ -0,0 +1,131 @@
+import hashlib
+import os
+import pickle
+import tempfile
+from typing import Any
+import gdio.attributeData
+import gdio.objectAttributeTransformation
+import gdio.processLevelData as pl
+
+# a persistent cache of parsed levels, so a level that hasn't changed since the last run doesn't have to be parsed
+# again. entries are keyed by a hash of the data the level was read from (the decrypted level string, or the
+# encrypted k4 value of a save) and hold the level's colors, headers and objects as plain attribute dicts, pickled
+# into one file each; loading one back reads and unpickles the whole entry, with no level string parsing.
+# the least recently used entries are dropped once the cache grows past max_bytes, and entries written while the
+# attribute tables (attributeData.py, objectAttributeTransformation.py) were different are ignored and cleaned up,
+# since the same level string would now parse differently.
+# note: this is a pickle cache, and unpickling runs whatever code an entry asks for. anyone who can write to the
+# directory can run code in every script using the cache, so only point it at a directory no one else can write to
+# (the default one is created readable by its owner only, but an existing directory's permissions are left alone)
+
+# bump whenever the layout of an entry changes
+cache_format = 1
+
+default_cache_dir = os.path.join(
+    os.getenv("localappdata") or os.getenv("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+    "gd-io",
+    "levels",
+)
+
+
+# a hash of everything that decides how a level string is parsed
+def attribute_tables_fingerprint() -> str:
+    fingerprint = hashlib.sha1(str(cache_format).encode())
+    for module in (gdio.attributeData, gdio.objectAttributeTransformation):
+        try:
+            with open(module.__file__, "rb") as f:
+                fingerprint.update(f.read())
+        except OSError:  # e.g. running from a zip; fall back to the tables themselves
+            tables = [gdio.attributeData.obj_attr_map, gdio.attributeData.col_attr_map]
+            attrs = [(key, attr.name, attr.type) for table in tables for key, attr in table.items()]
+            fingerprint.update(repr(attrs).encode())
+    return fingerprint.hexdigest()[:16]
+
+
+class gdLevelCache:
+    def __init__(self, directory: str = None, max_bytes: int = 512 * 1024 * 1024) -> None:
+        self.directory = directory or default_cache_dir
+        self.max_bytes = max_bytes
+        self.fingerprint = attribute_tables_fingerprint()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        # entries from other attribute tables can never be hit again
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".level") and not entry.name.startswith(self.fingerprint):
+                self.discard(entry.path)
+
+    def __str__(self) -> str:
+        return "level cache at {0}: {1} hits, {2} misses".format(self.directory, self.hits, self.misses)
+
+    # where the entry for the given source data (a level string or an encrypted k4 value) lives
+    def path(self, source: str | bytes) -> str:
+        digest = hashlib.sha1(source.encode("utf-8") if type(source) == str else source).hexdigest()
+        return os.path.join(self.directory, "{0}-{1}.level".format(self.fingerprint, digest))
+
+    # the level parsed from source, if it's in the cache
+    def get(self, source: str | bytes) -> pl.gdLevel | None:
+        path = self.path(source)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            with pl.paused_gc():
+                cols, headers, objs = pickle.loads(data)
+                lvl = pl.gdLevel(
+                    [pl.detached_object(attrs) for attrs in objs], [detached_color(attrs) for attrs in cols], headers
+                )
+            os.utime(path)  # most recently used
+        except (OSError, ValueError, pickle.UnpicklingError, EOFError):  # missing, empty or damaged
+            self.misses += 1
+            return None
+        self.hits += 1
+        return lvl
+
+    # store a level freshly parsed from source
+    def put(self, source: str | bytes, lvl: pl.gdLevel) -> None:
+        data = pickle.dumps(
+            (
+                [col.__dict__ for col in lvl.cols],
+                lvl.headers,
+                [obj.attributes() for obj in lvl.objs],
+            ),
+            protocol=pickle.HIGHEST_PROTOCOL,
+        )
+        # written under a temporary name first, so a reader never sees half an entry
+        fd, temp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temp, self.path(source))
+        except BaseException:
+            self.discard(temp)
+            raise
+        self.evict()
+
+    # drop the least recently used entries until the cache fits in max_bytes
+    def evict(self) -> None:
+        entries = [entry for entry in os.scandir(self.directory) if entry.name.endswith(".level")]
+        size = sum(entry.stat().st_size for entry in entries)
+        for entry in sorted(entries, key=lambda entry: entry.stat().st_mtime):
+            if size <= self.max_bytes:
+                break
+            size -= entry.stat().st_size
+            self.discard(entry.path)
+
+    def clear(self) -> None:
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".level"):
+                self.discard(entry.path)
+
+    def discard(self, path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+# a gdColor with the given attributes
+def detached_color(attrs: dict[str, Any]) -> pl.gdColor:
+    col = pl.gdColor.__new__(pl.gdColor)
+    col.__dict__.update(attrs)
+    return col
@@ -0,0 +1,188 @@
+import json
+from array import array
+from collections import Counter
+from typing import Any, Iterable
+import gdio.processLevelData as pl
+from gdio.attributeData import obj_attr_ids
+from gdio.spatialIndex import position_key
+
+# level patches: the objects added to, deleted from and changed in a level, written in terms of object segments of
+# the level string (the text between two ;s), so a patch can be applied to a level string with plain string
+# operations, without parsing it. a changed object is its original segment plus the attributes to set (already
+# encoded, as "key,value,...") and the keys to remove; everything else in the segment is kept as it was written.
+# patches come from a level loaded with extract_level(lvlstring, track_changes=True) (lvl.changes(), which applies to
+# that level string) or from comparing two levels (old.diff(new), which applies to old.compress())
+
+
+class gdLevelPatch:
+    def __init__(
+        self, deletes: Iterable[str] = (), adds: Iterable[str] = (), changes: Iterable[tuple[str, str, list[str]]] = ()
+    ) -> None:
+        self.deletes = list(deletes)  # segments to remove
+        self.adds = list(adds)  # segments to add
+        self.changes = list(changes)  # (segment, attributes to set, keys to remove)
+
+    def __len__(self) -> int:
+        return len(self.deletes) + len(self.adds) + len(self.changes)
+
+    def __str__(self) -> str:
+        return "patch: {0} added, {1} deleted, {2} changed".format(len(self.adds), len(self.deletes), len(self.changes))
+
+    # the patch as a JSON string, for sending to other tools (see load_patch)
+    def dumps(self) -> str:
+        return json.dumps(
+            {"delete": self.deletes, "add": self.adds, "change": [list(change) for change in self.changes]},
+            separators=(",", ":"),
+        )
+
+
+def load_patch(text: str) -> gdLevelPatch:
+    data = json.loads(text)
+    return gdLevelPatch(data["delete"], data["add"], [tuple(change) for change in data["change"]])
+
+
+# apply a patch to a level string; segments that aren't deleted or changed are copied over verbatim
+def apply_patch(lvlstring: str, patch: gdLevelPatch) -> str:
+    start, end = lvlstring.find(";") + 1, lvlstring.rfind(";") + 1
+    if start == 0:
+        raise Exception("Provided level string has no objects section")
+
+    deletes = Counter(patch.deletes)
+    changes: dict[str, list[tuple[str, list[str]]]] = {}
+    for segment, sets, removes in patch.changes:
+        changes.setdefault(segment, []).append((sets, removes))
+
+    segments = []
+    for segment in lvlstring[start:end].split(";")[:-1]:
+        if segment in deletes and deletes[segment] > 0:
+            deletes[segment] -= 1
+            continue
+        if segment in changes and changes[segment]:
+            segment = patch_segment(segment, *changes[segment].pop())
+        segments.append(segment)
+
+    missing = [segment for segment, count in deletes.items() if count > 0]
+    missing += [segment for segment, pending in changes.items() if pending]
+    if missing:
+        raise Exception("Patch doesn't apply to provided level string; object ({}) not found".format(missing[0]))
+    return lvlstring[:start] + "".join([segment + ";" for segment in segments + patch.adds]) + lvlstring[end:]
+
+
+# a segment with the given attributes ("key,value,...") set and keys removed
+def patch_segment(segment: str, sets: str, removes: list[str]) -> str:
+    pairs = iter(segment.split(","))
+    attrs = dict(zip(pairs, pairs))
+    pairs = iter(sets.split(",")) if sets else iter(())
+    attrs.update(zip(pairs, pairs))
+    for key in removes:
+        attrs.pop(key, None)
+    return ",".join([key + "," + value for key, value in attrs.items()])
+
+
+# the key an attribute is written under in a level string
+def attr_key(name: str) -> str:
+    return str(obj_attr_ids[name]) if name in obj_attr_ids else name
+
+
+# the (attributes to set, keys to remove) part of a change, for the given attribute names of an object
+def encode_change(attrs: dict[str, Any], names: Iterable[str]) -> tuple[str, list[str]]:
+    sets, removes = [], []
+    for name in names:
+        if name in attrs:
+            sets.append((pl.obj_attr_encoders.get(name) or pl.resolve_obj_encoder(name))(attrs[name]))
+        else:
+            removes.append(attr_key(name))
+    return ",".join(sets), removes
+
+
+# a patch turning old into new. objects are compared by their compressed segments; a deleted and an added object
+# at the same position with the same ID are written as a change of just the attributes that differ
+def diff_levels(old: pl.gdLevel, new: pl.gdLevel) -> gdLevelPatch:
+    old_segments = [obj.compress() for obj in old.objs]
+    new_segments = [obj.compress() for obj in new.objs]
+    old_objs, new_objs = dict(zip(old_segments, old.objs)), dict(zip(new_segments, new.objs))
+    old_counts, new_counts = Counter(old_segments), Counter(new_segments)
+    deleted = list((old_counts - new_counts).elements())
+    added = list((new_counts - old_counts).elements())
+
+    candidates: dict[tuple, list[str]] = {}
+    for segment in deleted:
+        candidates.setdefault(position_key(old_objs[segment]), []).append(segment)
+    patch = gdLevelPatch()
+    for segment in added:
+        matches = candidates.get(position_key(new_objs[segment]))
+        if not matches:
+            patch.adds.append(segment)
+            continue
+        before, after = old_objs[matches[-1]].attributes(), new_objs[segment].attributes()
+        names = [name for name in after if name not in before or before[name] != after[name]]
+        names += [name for name in before if name not in after]
+        patch.changes.append((matches.pop(),) + encode_change(after, names))
+    patch.deletes = [segment for matches in candidates.values() for segment in matches]
+    return patch
+
+
+# records what happened to a level's objects since it was read from a level string; kept up to date by the level
+# like its other indexes (see gdLevel.add_index). objects are matched to their segments of the original string by
+# the order they were read in, so the patch it produces (see patch) applies to that string
+class gdChangeTracker:
+    def __init__(self, source: str, objs: list[pl.gdObject]) -> None:
+        self.source = source
+        self.starts = array("l")  # where each object's segment starts and ends in source
+        self.ends = array("l")
+        start = source.find(";") + 1
+        end = source.find(";", start) if start > 0 else -1
+        while end != -1:
+            self.starts.append(start)
+            self.ends.append(end)
+            start = end + 1
+            end = source.find(";", start)
+        assert len(self.starts) == len(objs)
+        self.origin = {obj: i for i, obj in enumerate(objs)}  # object -> number of its segment in source
+        self.removed: dict[pl.gdObject, int] = {}
+        self.added: dict[pl.gdObject, None] = {}  # insertion ordered set
+        self.modified: dict[pl.gdObject, dict[str, None]] = {}  # object -> names of the attributes changed
+
+    def segment(self, i: int) -> str:
+        return self.source[self.starts[i] : self.ends[i]]
+
+    # an object put back after being removed is written as a delete of its original segment and an add
+    def add(self, obj: pl.gdObject) -> None:
+        if obj in self.origin and obj not in self.removed:
+            return
+        self.added[obj] = None
+
+    def remove(self, obj: pl.gdObject) -> None:
+        if obj in self.added:
+            del self.added[obj]
+        elif obj in self.origin and obj not in self.removed:
+            self.removed[obj] = self.origin[obj]
+            self.modified.pop(obj, None)
+
+    def update(self, obj: pl.gdObject, name: str) -> None:
+        if obj in self.origin and obj not in self.removed:
+            self.modified.setdefault(obj, {})[name] = None
+
+    # the level's objects were replaced wholesale
+    def reset(self, objs: Iterable[pl.gdObject]) -> None:
+        objs = list(objs)
+        live = set(objs)
+        for obj in list(self.added):
+            if obj not in live:
+                del self.added[obj]
+        for obj in self.origin:
+            if obj not in live:
+                self.remove(obj)
+        for obj in objs:
+            self.add(obj)
+
+    # everything that changed, as a patch for source
+    def patch(self) -> gdLevelPatch:
+        return gdLevelPatch(
+            [self.segment(i) for i in self.removed.values()],
+            [obj.compress() for obj in self.added],
+            [
+                (self.segment(self.origin[obj]),) + encode_change(obj.attributes(), names)
+                for obj, names in self.modified.items()
+            ],
+        )
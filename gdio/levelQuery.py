@@ -0,0 +1,355 @@
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Iterable, Iterator
+import gdio.processLevelData as pl
+from gdio.attributeData import obj_attr_codecs, obj_attr_ids
+from gdio.attributeIndex import gdAttributeIndex
+from gdio.columnarLevelData import gdColumnarLevel, gdColumnarSelection, gdObjectView, column_bits
+from gdio.spatialIndex import gdSpatialIndex, position_key
+
+# declarative object queries, e.g. lvl.query(ID=in_(1, 2, 3), x=between(0, 3000), groups=contains(42)) (see README).
+# conditions an index of the level can answer are looked up in it; the rest are compiled into a single test
+
+
+# one condition on an attribute's value
+class gdCondition(ABC):
+    cost = 1  # relative cost of one test; cheaper conditions are tested first
+
+    @abstractmethod
+    def test(self, value: Any) -> bool:
+        pass
+
+    # the test as a python expression on the variable named value (see compile_tests); constant(obj) gives the name
+    # under which obj can be used in it
+    def expression(self, value: str, constant: Callable[[Any], str]) -> str:
+        return "{0}({1})".format(constant(self.test), value)
+
+    # the objects an attribute index holds that satisfy the condition, if it can answer it
+    def lookup(self, index: gdAttributeIndex) -> set | None:
+        return None
+
+    def __repr__(self) -> str:
+        return "{0}({1})".format(type(self).__name__, ", ".join(map(repr, self.__dict__.values())))
+
+
+class gdEquals(gdCondition):
+    def __init__(self, value: Any) -> None:
+        self.value = value
+
+    def test(self, value: Any) -> bool:
+        return value == self.value and value != None
+
+    def expression(self, value: str, constant: Callable[[Any], str]) -> str:
+        return "{0} == {1} and {0} is not None".format(value, constant(self.value))
+
+    def lookup(self, index: gdAttributeIndex) -> set | None:
+        if type(self.value) in (list, tuple, set):  # compared whole, but indexes file lists element by element
+            return None
+        return index.objects.get(self.value, set())
+
+
+class gdIn(gdCondition):
+    def __init__(self, values: Iterable[Any]) -> None:
+        self.values = frozenset(values)
+
+    # for list attributes, any of the values in the list
+    def test(self, value: Any) -> bool:
+        if type(value) == list:
+            return not self.values.isdisjoint(value)
+        return value in self.values
+
+    def expression(self, value: str, constant: Callable[[Any], str]) -> str:
+        values = constant(self.values)
+        return "({0} in {1} if type({0}) != list else not {1}.isdisjoint({0}))".format(value, values)
+
+    def lookup(self, index: gdAttributeIndex) -> set | None:
+        found = set()
+        for value in self.values:
+            found.update(index.objects.get(value, ()))
+        return found
+
+
+class gdBetween(gdCondition):
+    cost = 2
+
+    def __init__(self, lo: Any = None, hi: Any = None) -> None:
+        self.lo = lo  # either bound may be None for no bound
+        self.hi = hi
+
+    def test(self, value: Any) -> bool:
+        return value != None and (self.lo == None or self.lo <= value) and (self.hi == None or value <= self.hi)
+
+    def expression(self, value: str, constant: Callable[[Any], str]) -> str:
+        if self.lo == None and self.hi == None:
+            return "{0} is not None".format(value)
+        if self.lo == None:
+            return "{0} is not None and {0} <= {1}".format(value, constant(self.hi))
+        if self.hi == None:
+            return "{0} is not None and {1} <= {0}".format(value, constant(self.lo))
+        return "{0} is not None and {1} <= {0} <= {2}".format(value, constant(self.lo), constant(self.hi))
+
+
+class gdContains(gdCondition):
+    cost = 3
+
+    def __init__(self, values: Iterable[Any]) -> None:
+        self.values = tuple(values)
+
+    # a list attribute holding every one of the values
+    def test(self, value: Any) -> bool:
+        return type(value) in (list, tuple) and all(v in value for v in self.values)
+
+    def expression(self, value: str, constant: Callable[[Any], str]) -> str:
+        return "type({0}) in (list, tuple)".format(value) + "".join(
+            " and {0} in {1}".format(constant(v), value) for v in self.values
+        )
+
+    def lookup(self, index: gdAttributeIndex) -> set | None:
+        found = None
+        for value in self.values:
+            objs = index.objects.get(value, set())
+            found = set(objs) if found == None else found & objs
+        return found
+
+
+class gdWhere(gdCondition):
+    cost = 10
+
+    def __init__(self, func: Callable[[Any], bool]) -> None:
+        self.func = func
+
+    def test(self, value: Any) -> bool:
+        return bool(self.func(value))
+
+    def expression(self, value: str, constant: Callable[[Any], str]) -> str:
+        return "{0}({1})".format(constant(self.func), value)
+
+
+def in_(*values: Any) -> gdIn:
+    return gdIn(values)
+
+
+def between(lo: Any = None, hi: Any = None) -> gdBetween:
+    return gdBetween(lo, hi)
+
+
+def contains(*values: Any) -> gdContains:
+    return gdContains(values)
+
+
+# the attribute name a query keyword stands for
+def attribute_name(key: str) -> str:
+    if key in obj_attr_ids or key.replace("_", "-") not in obj_attr_ids:
+        return key
+    return key.replace("_", "-")
+
+
+def as_condition(name: str, condition: Any) -> gdCondition:
+    if isinstance(condition, gdCondition):
+        return condition
+    if callable(condition):
+        return gdWhere(condition)
+    if name in obj_attr_ids and obj_attr_codecs[obj_attr_ids[name]].cast == list and type(condition) != list:
+        return gdContains((condition,))
+    return gdEquals(condition)
+
+
+# python expressions for the value an object (item) holds for an attribute: gdObject's defaults for ID/x/y, and None
+# for anything else missing. constant(obj) gives the name under which obj can be used in it
+def attribute_source(name: str, constant: Callable[[Any], str]) -> str:
+    default = vars(pl.gdObject).get(name) if name in ("ID", "x", "y") else None
+    return "getattr(item, {0}, {1})".format(constant(name), constant(default))
+
+
+# the same for a row (item) of a columnar store, reading the columns directly
+def row_source(store: Any, name: str, constant: Callable[[Any], str]) -> str:
+    default = constant(vars(pl.gdObject).get(name) if name in ("ID", "x", "y") else None)
+    extra = "({0}[item].get({1}, {2}) if item in {0} else {2})".format(constant(store.extra), constant(name), default)
+    if name not in column_bits:
+        return extra
+    return "({0}[item] if {1}[item] & {2} else {3})".format(
+        constant(store.columns[name]), constant(store.present), column_bits[name], extra
+    )
+
+
+# one function testing every (name, condition) in order on an item, stopping at the first that fails. the tests are
+# compiled into the body of a single function, which saves several python calls per object over calling every
+# condition's test in turn; source(name, constant) gives the expression for an item's value of an attribute
+def compile_tests(
+    tests: list[tuple[str, gdCondition]], source: Callable[[str, Callable[[Any], str]], str]
+) -> Callable[[Any], bool]:
+    constants: dict[str, Any] = {}
+
+    def constant(obj: Any) -> str:
+        if obj == None or type(obj) in (bool, int):
+            return repr(obj)
+        name = "c{0}".format(len(constants))
+        constants[name] = obj
+        return name
+
+    lines = ["def matches(item):"]
+    for name, condition in tests:
+        lines.append("    value = " + source(name, constant))
+        lines.append("    if not ({0}):".format(condition.expression("value", constant)))
+        lines.append("        return False")
+    lines.append("    return True")
+    exec("\n".join(lines), constants)
+    return constants["matches"]
+
+
+# a lazy query: every run sees the level as it is then. matches come in the level's order, except a few picked out by
+# an index, which come in (x, y, ID) order
+class gdQuery:
+    def __init__(self, level: pl.gdLevel, conditions: dict[str, Any] = None, **kwargs: Any) -> None:
+        self.level = level
+        self.conditions: list[tuple[str, gdCondition]] = []  # cheapest first
+        self.add(dict(conditions or {}, **kwargs))
+        self.compiled: dict[tuple, Callable] = {}  # the tests left over by each way of finding candidates
+
+    def add(self, conditions: dict[str, Any]) -> None:
+        for key, condition in conditions.items():
+            name = attribute_name(key)
+            self.conditions.append((name, as_condition(name, condition)))
+        self.conditions.sort(key=lambda item: item[1].cost)  # stable, so equal costs keep the order given
+
+    # a query with further conditions, all of which have to hold as well
+    def where(self, conditions: dict[str, Any] = None, **kwargs: Any) -> "gdQuery":
+        query = gdQuery(self.level)
+        query.conditions = list(self.conditions)
+        query.add(dict(conditions or {}, **kwargs))
+        return query
+
+    # (how candidates are found, the candidates or None for every object, the conditions still to test on them).
+    # decided on every run, since the indexes a level has can change
+    def plan(self) -> tuple[str, Iterable | None, list[tuple[str, gdCondition]]]:
+        indexes = {
+            index.names[0]: index
+            for index in self.level.indexes
+            if type(index) == gdAttributeIndex and len(index.names) == 1
+        }
+        found, used, rest = None, [], []
+        for name, condition in self.conditions:
+            objs = condition.lookup(indexes[name]) if name in indexes else None
+            if objs == None:
+                rest.append((name, condition))
+                continue
+            found = set(objs) if found == None else found & objs
+            used.append(name)
+        if found != None:
+            if len(found) * 8 > len(self.level.objs):  # cheaper to pick them out of the level, in its own order
+                return "{0} index".format("/".join(used)), filter(found.__contains__, self.level.objs), rest
+            return "{0} index".format("/".join(used)), sorted(found, key=position_key), rest
+
+        spatial = next((index for index in self.level.indexes if type(index) == gdSpatialIndex), None)
+        x = self.bounds("x")
+        if spatial != None and x != None and x.lo != None and x.hi != None:
+            y = self.bounds("y")
+            objs = spatial.in_rect(x.lo, y.lo if y else None, x.hi, y.hi if y else None)
+            return "spatial index", objs, [item for item in self.conditions if item[1] is not x and item[1] is not y]
+
+        if isinstance(self.level, gdColumnarLevel):
+            return "column scan", None, self.conditions
+        return "scan", None, self.conditions
+
+    # the first between condition on name
+    def bounds(self, name: str) -> gdBetween | None:
+        return next((c for n, c in self.conditions if n == name and type(c) == gdBetween), None)
+
+    # the compiled test for the given conditions, on objects or (for a column scan) on rows of the level's store
+    def test(self, rest: list[tuple[str, gdCondition]], rows: bool = False) -> Callable | None:
+        if not rest:
+            return None
+        # row tests read the columns of the store they were compiled for, which compacting the level replaces
+        key = (self.level.store if rows else None,) + tuple(id(condition) for name, condition in rest)
+        if key not in self.compiled:
+            if rows:
+                source = lambda name, constant: row_source(self.level.store, name, constant)
+            else:
+                source = attribute_source
+            self.compiled[key] = compile_tests(rest, source)
+        return self.compiled[key]
+
+    def __iter__(self) -> Iterator[pl.gdObject]:
+        method, objs, rest = self.plan()
+        if method == "column scan":
+            store = self.level.store
+            test = self.test(rest, rows=True)
+            rows = self.level.objs.rows if test == None else filter(test, self.level.objs.rows)
+            return (gdObjectView(store, row) for row in rows)
+        if objs == None:
+            objs = self.level.objs
+        test = self.test(rest)
+        return iter(objs) if test == None else filter(test, objs)
+
+    def __bool__(self) -> bool:
+        return self.first() != None
+
+    def __len__(self) -> int:
+        return self.count()
+
+    def count(self) -> int:
+        return sum(1 for _ in self)
+
+    # the first match (in the level's order), or None
+    def first(self) -> pl.gdObject | None:
+        return next(iter(self), None)
+
+    def list(self) -> list[pl.gdObject]:
+        return list(iter(self))  # list(self) would run the query twice, once for __len__
+
+    # the value of an attribute for every match (None where it's missing)
+    def values(self, name: str) -> Iterator[Any]:
+        name = attribute_name(name)
+        default = vars(pl.gdObject).get(name) if name in ("ID", "x", "y") else None
+        return (getattr(obj, name, default) for obj in self)
+
+    # call func on every match, returning how many there were
+    def map(self, func: Callable[[pl.gdObject], None]) -> int:
+        count = 0
+        for obj in self:
+            func(obj)
+            count += 1
+        return count
+
+    # set attributes on every match, returning how many there were; a function as a value is called with the object
+    # to give its new value, e.g. update(x=lambda obj: obj.x + 30)
+    def update(self, attrs: dict[str, Any] = None, **kwargs: Any) -> int:
+        attrs = {attribute_name(key): value for key, value in dict(attrs or {}, **kwargs).items()}
+        count = 0
+        for obj in self:
+            for name, value in attrs.items():
+                setattr(obj, name, value(obj) if callable(value) else value)
+            count += 1
+        return count
+
+    # remove every match from the level, returning how many there were
+    def delete(self) -> int:
+        objs = list(iter(self))
+        if objs:
+            self.level.objs.remove_all(objs)
+        return len(objs)
+
+    # the matches as a selection, for moving/rotating/scaling/mirroring them together
+    def select(self) -> pl.gdSelection:
+        if isinstance(self.level, gdColumnarLevel):
+            return gdColumnarSelection(self.level.store, [view._row for view in self])
+        return pl.gdSelection(iter(self))
+
+    # how the query would run right now, e.g. "spatial index, then ID in {1, 2}, groups contains (42,)"
+    def explain(self) -> str:
+        method, objs, rest = self.plan()
+        return method + (", then " + ", ".join("{0} {1}".format(name, describe(c)) for name, c in rest) if rest else "")
+
+    def __repr__(self) -> str:
+        return "gdQuery({0})".format(", ".join("{0}={1!r}".format(name, c) for name, c in self.conditions))
+
+
+def describe(condition: gdCondition) -> str:
+    if type(condition) == gdEquals:
+        return "== {0!r}".format(condition.value)
+    if type(condition) == gdIn:
+        return "in {0}".format(sorted(condition.values, key=repr))
+    if type(condition) == gdBetween:
+        return "between {0!r} and {1!r}".format(condition.lo, condition.hi)
+    if type(condition) == gdContains:
+        return "contains {0}".format(", ".join(map(repr, condition.values)))
+    return "matches {0}".format(getattr(condition.func, "__name__", "function"))
@@ -1,12 +1,21 @@
+import atexit
 import base64
-import gzip
 import os
+import stat
 import zlib
 import struct
+import tempfile
+import threading
+import tracemalloc
 import xml.etree.ElementTree as ET
 import subprocess
+from typing import BinaryIO, Callable, Iterable, Iterator
+import gdio.processLevelData as pl
+from gdio.levelCache import gdLevelCache
+from gdio.pipelineProfiler import stage
 
-gamedir = os.getenv("localappdata") + "\\GeometryDash\\"
+# GDIO_GAMEDIR points everything at another save directory (e.g. a copy of the save, or a wine prefix on linux)
+gamedir = os.getenv("GDIO_GAMEDIR") or os.getenv("localappdata", "") + "\\GeometryDash\\"
 locallevels = "CCLocalLevels.dat"
 
 # most of the methods in this file are condensed, simplified versions of the code present with sputnix's version
@@ -21,77 +30,508 @@ def encryptreplace(string: str) -> str:
 
 
 def xor(data, key):
-    return bytearray([i ^ key for i in data]).decode()
+    return bytes(data).translate(xor_table(key)).decode()
+
+
+# translation table xor-ing every byte with key
+def xor_table(key: int) -> bytes:
+    return bytes(i ^ key for i in range(256))
+
+
+# CCLocalLevels.dat is url-safe base64 with every byte xor-ed with 11; these tables undo/redo the xor and the alphabet
+# swap in a single bytes.translate pass (on decode, bytes that xor to \0 are deleted, like decryptreplace did)
+gamesave_key = 11
+gamesave_decode_table = bytes(
+    (i ^ gamesave_key) if (i ^ gamesave_key) not in b"-_" else b"+/"[b"-_".index(i ^ gamesave_key)] for i in range(256)
+)
+gamesave_encode_table = bytes(
+    (i if i not in b"+/" else b"-_"[b"+/".index(i)]) ^ gamesave_key for i in range(256)
+)
 
 
 def decrypt(ls):
-    data = decryptreplace(ls)
-    while len(data) % 4 != 0:
-        data += "="
-    data = base64.b64decode(data)
-    return gzip.decompress(data)
+    with stage("decrypt level string") as timing:
+        data = b"".join(decrypt_chunks([ls.encode()]))
+        timing.count(bytes_in=len(ls), bytes_out=len(data))
+    return data
+
+
+# dls may be the level string as bytes, or an iterable of byte chunks (e.g. gdLevel.compress_iter())
+def encrypt(dls, level=9):
+    with stage("encrypt level string") as timing:
+        stats = gdCodecStats()
+        chunks = encrypt_chunks([dls] if type(dls) == bytes else dls, level, stats)
+        data = "".join([chunk.decode() for chunk in chunks])
+        timing.count(bytes_in=stats.bytes_in, bytes_out=stats.bytes_out)
+    return data
+
+
+# the gzip header the game writes: no mtime, no flags, OS byte 0x0b (what the "H4sIAAAAAAAAC" prefix encodes)
+gzip_header = b"\x1f\x8b\x08\x00\x00\x00\x00\x00\x00\x0b"
+fromurlsafe = bytes.maketrans(b"-_", b"+/")
+
+
+# base64 -> gunzipped level string, chunk by chunk; only a few bytes of base64 are ever held back between chunks
+def decrypt_chunks(chunks: Iterable[bytes], stats: "gdCodecStats" = None) -> Iterator[bytes]:
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    pending = b""
+    for chunk in chunks:
+        pending += chunk.translate(fromurlsafe, b"\0")
+        cut = len(pending) - len(pending) % 4
+        data = decompressor.decompress(base64.b64decode(pending[:cut]))
+        pending = pending[cut:]
+        if stats != None:
+            stats.update(len(chunk), len(data))
+        yield data
+    data = decompressor.decompress(base64.b64decode(pending + b"=" * (-len(pending) % 4))) + decompressor.flush()
+    if stats != None:
+        stats.update(0, len(data))
+    yield data
 
 
-def encrypt(dls):
-    data = gzip.compress(dls)
-    data = base64.b64encode(data)
-    return "H4sIAAAAAAAAC" + encryptreplace(data.decode("utf-8"))[13:]
+# level string -> gzipped url-safe base64, chunk by chunk; level trades compression time against size (0-9)
+def encrypt_chunks(chunks: Iterable[bytes], level: int = 9, stats: "gdCodecStats" = None) -> Iterator[bytes]:
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    crc = 0
+    size = 0
+    pending = gzip_header
+    for chunk in chunks:
+        crc = zlib.crc32(chunk, crc)
+        size += len(chunk)
+        pending += compressor.compress(chunk)
+        cut = len(pending) - len(pending) % 3
+        data = base64.urlsafe_b64encode(pending[:cut])
+        pending = pending[cut:]
+        if stats != None:
+            stats.update(len(chunk), len(data))
+        yield data
+    data = base64.urlsafe_b64encode(pending + compressor.flush() + struct.pack("<II", crc, size & 0xFFFFFFFF))
+    if stats != None:
+        stats.update(0, len(data))
+    yield data
 
 
-def decrypt_gamesave():
-    with open(gamedir + locallevels, "rb") as f:
-        data = f.read()
-    res = xor(data, 11)
-    return zlib.decompress(base64.b64decode(decryptreplace(res).encode())[10:], -zlib.MAX_WBITS)
+# figures reported by decrypt_stream/encrypt_stream
+# peak_memory is the most memory (in bytes) allocated at once during the call, only measured if asked for
+class gdCodecStats:
+    def __init__(self) -> None:
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.peak_memory = None
 
+    def update(self, bytes_in: int, bytes_out: int) -> None:
+        self.bytes_in += bytes_in
+        self.bytes_out += bytes_out
 
-def encrypt_gamesave(data):
-    encrypted = b"\x1f\x8b\x08\x00\x00\x00\x00\x00\x00\x0b"
-    encrypted += zlib.compress(data)[2:-4] + struct.pack("I", zlib.crc32(data)) + struct.pack("I", len(data))
-    encoded = encryptreplace(base64.b64encode(encrypted).decode()).encode()
-    fin = xor(encoded, 11).encode()
+    def __str__(self) -> str:
+        return "{0} bytes in, {1} bytes out, peak memory {2}".format(
+            self.bytes_in, self.bytes_out, "n/a" if self.peak_memory == None else str(self.peak_memory) + " bytes"
+        )
 
+
+# streaming versions of decrypt/encrypt, reading from and writing to binary file-like objects in chunk_size pieces
+# so that the full payload is never held in memory; measure_memory traces allocations (slower) to fill in peak_memory
+def decrypt_stream(src: BinaryIO, dst: BinaryIO, chunk_size: int = 1 << 16, measure_memory=False) -> gdCodecStats:
+    return run_stream(decrypt_chunks, src, dst, chunk_size, measure_memory)
+
+
+def encrypt_stream(
+    src: BinaryIO, dst: BinaryIO, level: int = 9, chunk_size: int = 1 << 16, measure_memory=False
+) -> gdCodecStats:
+    return run_stream(lambda chunks, stats: encrypt_chunks(chunks, level, stats), src, dst, chunk_size, measure_memory)
+
+
+def run_stream(codec, src: BinaryIO, dst: BinaryIO, chunk_size: int, measure_memory: bool) -> gdCodecStats:
+    stats = gdCodecStats()
+    tracing = tracemalloc.is_tracing()
+    if measure_memory:
+        if not tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
     try:
-        with open(gamedir + locallevels, "wb") as f:
-            f.write(fin)
+        for data in codec(iter(lambda: src.read(chunk_size), b""), stats):
+            dst.write(data)
+        if measure_memory:
+            stats.peak_memory = tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        if measure_memory and not tracing:
+            tracemalloc.stop()
+    return stats
+
+
+# path defaults to the game's own CCLocalLevels.dat
+def decrypt_gamesave(path=None):
+    with stage("read save file") as timing:
+        with open(path if path != None else os.path.join(gamedir, locallevels), "rb") as f:
+            data = f.read()
+        timing.count(bytes_in=len(data))
+    return decode_gamesave(data)
+
+
+# the save is replaced in one step (see write_atomically); gdSaveWriter does the same on a background thread
+def encrypt_gamesave(data, level=-1, path=None):
+    fin = encode_gamesave(data, level)
+
+    try:
+        write_gamesave(fin, path)
         update_runs()
     except:
-        print("Failed to write:", locallevels)
+        print("Failed to write:", path if path != None else locallevels)
+
+
+def write_gamesave(fin: bytes, path: str = None) -> None:
+    with stage("write save file") as timing:
+        write_atomically(path if path != None else os.path.join(gamedir, locallevels), fin)
+        timing.count(bytes_out=len(fin))
+
+
+# the mode open() gives new files (read once, since reading the umask means setting it, which isn't thread safe)
+umask = os.umask(0)
+os.umask(umask)
+new_file_mode = 0o666 & ~umask
+
+
+# write data to a temporary file next to path, flush it to disk and rename it over path, so that a crash (or the
+# game writing the save at the same time) leaves either the old file or the new one, never half of one
+def write_atomically(path: str, data: bytes) -> None:
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        try:  # mkstemp creates the file as 0600; keep the permissions path had, or give it those of a new file
+            mode = stat.S_IMODE(os.stat(path).st_mode)
+        except OSError:
+            mode = new_file_mode
+        os.chmod(temp, mode)
+        os.replace(temp, path)
+    except BaseException:
+        try:
+            os.remove(temp)
+        except OSError:
+            pass
+        raise
+    sync_directory(directory)
+
+
+# make a rename in directory durable; directories can't be opened on windows, where renames don't need this
+def sync_directory(directory: str) -> None:
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+# compresses and writes save files on a background thread, so a script can carry on (or end) in the meantime.
+# saves queued to a file while an earlier one is still waiting are written together: a whole new save replaces
+# everything before it, and updates (see save) are applied in order on top of the latest save queued before them,
+# so rapid successive saves become one write. flush() waits until everything queued is on disk, as does leaving a
+# with block around the writer; the program doesn't exit before the last write is done
+class gdSaveWriter:
+    def __init__(self, level: int = -1) -> None:
+        self.level = level  # zlib compression level of the save files (see encode_gamesave)
+        self.condition = threading.Condition()
+        # path -> (latest whole save queued for it, or None for the file as it is, updates queued after it)
+        self.pending: dict[str | None, tuple[bytes | None, list[Callable[[bytes | None], bytes]]]] = {}
+        self.thread = None  # the thread writing, while there's anything to write
+        self.error = None  # the first failed write since the last flush
+        self.writes = 0  # saves written
+        self.coalesced = 0  # saves written together with a later one
+
+    def __enter__(self) -> "gdSaveWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.flush()
+
+    # queue a save: its XML (what encrypt_gamesave takes), or an update, a function called on the writer's thread
+    # with the save's XML so far (None when nothing is queued before it, for the file as it is on disk) and
+    # returning the new XML. path defaults to the game's own CCLocalLevels.dat
+    def save(self, data: bytes | Callable[[bytes | None], bytes], path: str = None) -> None:
+        with self.condition:
+            if path in self.pending:
+                self.coalesced += 1
+            if callable(data):
+                self.pending.setdefault(path, (None, []))[1].append(data)
+            else:
+                self.pending[path] = (data, [])
+            if self.thread == None:
+                self.thread = threading.Thread(target=self.run, name="gdSaveWriter")
+                self.thread.start()
 
+    def run(self) -> None:
+        while True:
+            with self.condition:
+                if not self.pending:
+                    self.thread = None
+                    self.condition.notify_all()
+                    return
+                path = next(iter(self.pending))
+                data, updates = self.pending.pop(path)
+            try:
+                for update in updates:
+                    data = update(data)
+                write_gamesave(encode_gamesave(data, self.level), path)
+                update_runs()
+                with self.condition:
+                    self.writes += 1
+            except Exception as error:
+                print("Failed to write:", path if path != None else locallevels)
+                with self.condition:
+                    self.error = self.error or error
 
-def read_leveldata(decrypt_lvlstring=True) -> dict[str, str]:
-    root = ET.ElementTree(ET.fromstring(decrypt_gamesave())).getroot()
+    # wait until every queued save is written; raises the first write that failed since the last flush, if any
+    def flush(self, timeout: float = None) -> None:
+        with self.condition:
+            if not self.condition.wait_for(lambda: self.thread == None, timeout):
+                raise TimeoutError("Saves weren't written within {} seconds".format(timeout))
+            error, self.error = self.error, None
+        if error != None:
+            raise error
+
+
+# contents of CCLocalLevels.dat -> save XML, staying in bytes throughout
+def decode_gamesave(data: bytes) -> bytes:
+    with stage("transcode save") as timing:
+        decoded = base64.b64decode(data.translate(gamesave_decode_table, bytes([gamesave_key])))
+        timing.count(bytes_in=len(data), bytes_out=len(decoded))
+    with stage("inflate save") as timing:
+        xml = zlib.decompress(memoryview(decoded)[10:], -zlib.MAX_WBITS)
+        timing.count(bytes_in=len(decoded), bytes_out=len(xml))
+    return xml
+
+
+# save XML -> contents of CCLocalLevels.dat; level is the zlib compression level (-1 is zlib's default, 6)
+def encode_gamesave(data: bytes, level: int = -1) -> bytes:
+    with stage("deflate save") as timing:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+        encrypted = gzip_header + compressor.compress(data) + compressor.flush()
+        encrypted += struct.pack("<II", zlib.crc32(data), len(data) & 0xFFFFFFFF)
+        timing.count(bytes_in=len(data), bytes_out=len(encrypted))
+    with stage("transcode save") as timing:
+        encoded = base64.b64encode(encrypted).translate(gamesave_encode_table)
+        timing.count(bytes_in=len(encrypted), bytes_out=len(encoded))
+    return encoded
+
+
+def read_leveldata(decrypt_lvlstring=True, path=None) -> dict[str, str]:
+    root = parse_xml(decrypt_gamesave(path))
     lvlnode = [node.text for node in root[0][1][3]]
     lvldata = dict(zip(lvlnode[::2], lvlnode[1::2]))
     if decrypt_lvlstring:
-        lvldata["k4"] = str(decrypt(lvldata["k4"]))
+        lvldata["k4"] = decrypt(lvldata["k4"]).decode()
     print("Accessing level", lvldata["k2"])
     return lvldata
 
 
-def write_leveldata(lvlstring: str, start_game=False) -> None:
-    root = ET.ElementTree(ET.fromstring(decrypt_gamesave())).getroot()
-    lvldata_index = [node.text for node in root[0][1][3]].index("k4") + 1
-    root[0][1][3][lvldata_index].text = encrypt(bytes(lvlstring, "utf-8"))
-    encrypt_gamesave(ET.tostring(root, encoding="utf8", method="xml"))
+# lvlstring may also be given already utf-8 encoded, either whole or as chunks (e.g. gdLevel.compress_iter()),
+# which skips building and re-encoding the full string; level is the gzip compression level
+# with a writer (a gdSaveWriter), the save is read, updated and written on the writer's thread instead
+def write_leveldata(
+    lvlstring: str | bytes | Iterable[bytes], start_game=False, level=9, path=None, writer: "gdSaveWriter" = None
+) -> None:
+    if writer != None:
+        if type(lvlstring) not in (str, bytes):  # chunks of a level that may be edited again in the meantime
+            lvlstring = b"".join(lvlstring)
+        writer.save(lambda xml: leveldata_xml(lvlstring, level, path, xml), path)
+        if start_game:
+            writer.flush()
+    else:
+        encrypt_gamesave(leveldata_xml(lvlstring, level, path), path=path)
     if start_game: subprocess.call(r"cmd /c start steam://run/322170")  # open gd
 
 
+# the save's XML (xml, or else the file's) with the topmost level's level string replaced
+def leveldata_xml(lvlstring: str | bytes | Iterable[bytes], level: int, path: str = None, xml: bytes = None) -> bytes:
+    root = parse_xml(decrypt_gamesave(path) if xml == None else xml)
+    lvldata_index = [node.text for node in root[0][1][3]].index("k4") + 1
+    root[0][1][3][lvldata_index].text = encrypt(
+        bytes(lvlstring, "utf-8") if type(lvlstring) == str else lvlstring, level
+    )
+    return serialize_xml(root)
+
+
+def parse_xml(xml: bytes) -> ET.Element:
+    with stage("parse XML") as timing:
+        root = ET.fromstring(xml)
+        timing.count(bytes_in=len(xml))
+    return root
+
+
+def serialize_xml(root: ET.Element) -> bytes:
+    with stage("serialize XML") as timing:
+        xml = ET.tostring(root, encoding="utf8", method="xml")
+        timing.count(bytes_out=len(xml))
+    return xml
+
+
+# a session over a whole save file: CCLocalLevels.dat is decrypted and parsed once, every level in it is indexed,
+# and save() re-encodes only the levels that were changed before writing the file once.
+# levels can be looked up by name (str) or by their k1 ID (int); levels holds them all, topmost first.
+# with a cache (a gdLevelCache), levels unchanged since they were last opened skip decrypting and parsing k4
+class gdGameSave:
+    def __init__(self, path: str = None, cache: gdLevelCache = None) -> None:
+        self.path = path
+        self.root = parse_xml(decrypt_gamesave(path))
+        nodes = list(self.root[0][1])
+        self.levels = [
+            gdSavedLevel(nodes[i + 1], cache) for i in range(0, len(nodes) - 1, 2) if nodes[i + 1].tag == "d"
+        ]
+        self.by_name = {}
+        self.by_id = {}
+        for saved in reversed(self.levels):  # so the topmost of two levels with the same name/ID wins
+            self.by_name[saved.name] = saved
+            if saved.id != None:
+                self.by_id[saved.id] = saved
+
+    def __getitem__(self, key: str | int) -> "gdSavedLevel":
+        return self.by_name[key] if type(key) == str else self.by_id[key]
+
+    def __contains__(self, key: str | int) -> bool:
+        return key in (self.by_name if type(key) == str else self.by_id)
+
+    def __iter__(self) -> Iterator["gdSavedLevel"]:
+        return iter(self.levels)
+
+    def __len__(self) -> int:
+        return len(self.levels)
+
+    # re-encode the changed levels and write the save back, returning how many levels were re-encoded.
+    # level is the gzip compression level used for the re-encoded levels. with a writer (a gdSaveWriter), the save
+    # file is compressed and written on the writer's thread; the levels are encoded before save returns, so they can
+    # be edited again straight away
+    def save(self, start_game=False, level=9, writer: gdSaveWriter = None) -> int:
+        dirty = [saved for saved in self.levels if saved.dirty]
+        for saved in dirty:
+            saved.encode(level)
+        if writer != None:
+            writer.save(serialize_xml(self.root), self.path)
+            if start_game:
+                writer.flush()
+        else:
+            encrypt_gamesave(serialize_xml(self.root), path=self.path)
+        if start_game: subprocess.call(r"cmd /c start steam://run/322170")  # open gd
+        return len(dirty)
+
+
+# a single level within a gdGameSave. the k4 level string is only decrypted when lvlstring is first read, and only
+# parsed when level is first read; reading level marks the level as changed, since the gdLevel may be edited in place
+class gdSavedLevel:
+    def __init__(self, node: ET.Element, cache: gdLevelCache = None) -> None:
+        self.node = node
+        self.cache = cache
+        children = list(node)
+        self.values = {children[i].text: children[i + 1] for i in range(0, len(children) - 1, 2)}
+        self.name = self.values["k2"].text if "k2" in self.values else None
+        self.id = int(self.values["k1"].text) if "k1" in self.values else None
+        self.dirty = False
+        self._lvlstring = None
+        self._level = None
+
+    def __str__(self) -> str:
+        return '"{0}" (ID {1})'.format(self.name, self.id)
+
+    # the level's headers as a dict, same as read_leveldata (with k4 left encrypted)
+    def data(self) -> dict[str, str]:
+        return {key: value.text for key, value in self.values.items()}
+
+    @property
+    def lvlstring(self) -> str:
+        if self._level != None:
+            return self._level.compress()
+        if self._lvlstring == None:
+            self._lvlstring = decrypt(self.values["k4"].text).decode("utf-8")
+        return self._lvlstring
+
+    @lvlstring.setter
+    def lvlstring(self, lvlstring: str) -> None:
+        self._lvlstring = lvlstring
+        self._level = None
+        self.dirty = True
+
+    @property
+    def level(self) -> pl.gdLevel:
+        if self._level == None and self.cache != None and self._lvlstring == None and "k4" in self.values:
+            # keyed by the encrypted k4, so a hit skips decrypting as well as parsing
+            self._level = self.cache.get(self.values["k4"].text)
+            if self._level == None:
+                self._level = pl.extract_level(self.lvlstring)
+                self.cache.put(self.values["k4"].text, self._level)
+            self._lvlstring = None
+        if self._level == None:
+            self._level = pl.extract_level(self.lvlstring)
+            self._lvlstring = None
+        self.dirty = True
+        return self._level
+
+    @level.setter
+    def level(self, lvl: pl.gdLevel) -> None:
+        self._level = lvl
+        self._lvlstring = None
+        self.dirty = True
+
+    # write the current level string back into the save's XML
+    def encode(self, level=9) -> None:
+        if "k4" not in self.values:  # the game leaves k4 out for empty levels
+            ET.SubElement(self.node, "k").text = "k4"
+            self.values["k4"] = ET.SubElement(self.node, "s")
+        if self._level != None:
+            self.values["k4"].text = encrypt(self._level.compress_iter(), level)
+        else:
+            self.values["k4"].text = encrypt(bytes(self.lvlstring, "utf-8"), level)
+        self.dirty = False
+
+
 def write_levelstring_to_file(lvldata: dict[str, str]) -> None:
     with open("data/lvldata/" + lvldata["k2"] + ".txt", "w") as f:
         f.write(lvldata["k4"])
 
 
+# the number of saves written, kept in runs.txt (in the working directory the first save was written from). the count
+# is kept in memory and only written to runs.txt once, when the program exits (or on flush_runs)
+runs_path = None
+runs = 0  # the count in runs.txt when it was last read
+unflushed_runs = 0
+runs_lock = threading.Lock()
+
+
 def update_runs():
-    if not os.path.exists("runs.txt"):
-        f = open("runs.txt", "w+")
-        f.write(str(0))
-        f.close()
-    f = open("runs.txt", "r")
-    runs = int(f.read())
-    runs = runs + 1
-    f.close()
-    f = open("runs.txt", "w")
-    f.write(str(runs))
-    f.close()
-    print("Done!", runs)
+    global runs_path, runs, unflushed_runs
+    with runs_lock:
+        if runs_path == None:
+            runs_path = os.path.abspath("runs.txt")
+            runs = read_runs()
+            atexit.register(flush_runs)
+        unflushed_runs += 1
+        print("Done!", runs + unflushed_runs)
+
+
+def read_runs() -> int:
+    try:
+        with open(runs_path) as f:
+            return int(f.read())
+    except (OSError, ValueError):
+        return 0
+
+
+def flush_runs() -> None:
+    global runs, unflushed_runs
+    with runs_lock:
+        if runs_path == None or unflushed_runs == 0:
+            return
+        runs = read_runs() + unflushed_runs  # counting any runs other programs added in the meantime
+        unflushed_runs = 0
+        try:
+            with open(runs_path, "w") as f:
+                f.write(str(runs))
+        except OSError:  # the directory may be gone by the time the program exits
+            pass
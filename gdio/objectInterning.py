@@ -0,0 +1,133 @@
+from typing import Any, Iterator
+import gdio.processLevelData as pl
+
+# flyweights for levels made of many copies of the same objects (see README): a gdInterner decodes equal values
+# once, and objects that only differ in position share a gdObjectTemplate. slower on levels that don't repeat
+
+
+# the attributes shared by the objects of one segment (minus position), and their encoding
+class gdObjectTemplate:
+    __slots__ = ("attrs", "lists", "encoded", "uses")
+
+    def __init__(self, attrs: dict[str, Any]) -> None:
+        self.attrs = attrs  # the (shared) attributes of the segment, in the order they're written in
+        self.lists = tuple(name for name, value in attrs.items() if type(value) == list)  # copied for every object
+        self.encoded: tuple[str, str, str] | None = None  # the segment around x and y, see parts
+        self.uses = 0  # objects made from it
+
+    # whether attrs (an object's, besides its position) are still the template's
+    def matches(self, attrs: dict[str, Any]) -> bool:
+        return len(attrs) == len(self.attrs) and {**attrs, "x": self.attrs["x"], "y": self.attrs["y"]} == self.attrs
+
+    # the encoded attributes before x, between x and y and after y, each with the commas joining them to x and y
+    # (x always comes before y, since only segments starting with 1,ID,2,x,3,y get a template)
+    def parts(self) -> tuple[str, str, str]:
+        if self.encoded == None:
+            encoders = pl.obj_attr_encoders
+            fragments = [(encoders.get(key) or pl.resolve_obj_encoder(key))(value) for key, value in self.attrs.items()]
+            rest = ",".join(fragments[3:])
+            self.encoded = (fragments[0] + ",", ",", "," + rest if rest else "")
+        return self.encoded
+
+    def compress(self, attrs: dict[str, Any]) -> str:
+        head, middle, tail = self.parts()
+        return head + pl.obj_attr_encoders["x"](attrs["x"]) + middle + pl.obj_attr_encoders["y"](attrs["y"]) + tail
+
+
+# an object read through a gdInterner, sharing its template with the objects that only differ from it in position.
+# setting or deleting anything but x and y drops the template; edits made in place are caught by compress
+class gdSharedObject(pl.gdObject):
+    __slots__ = ("_template",)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name != "x" and name != "y":
+            object.__setattr__(self, "_template", None)
+        pl.gdObject.__setattr__(self, name, value)
+
+    def __delattr__(self, name: str) -> None:
+        object.__setattr__(self, "_template", None)
+        pl.gdObject.__delattr__(self, name)
+
+    # copies/pickles are plain gdObjects
+    def __reduce__(self) -> tuple:
+        return (pl.detached_object, (dict(self.__dict__),))
+
+    def compress(self, strict: bool = False) -> str:
+        template = self._template
+        if template != None and not strict and template.matches(self.__dict__):
+            return template.compress(self.__dict__)
+        return pl.gdObject.compress(self, strict)
+
+
+class gdInterner:
+    def __init__(self) -> None:
+        self.values: dict[str, dict[str, Any]] = {}  # key as written in a level string -> raw value -> decoded value
+        self.templates: dict[str, gdObjectTemplate] = {}  # segment without its position -> template
+        self.seen: set[str] = set()  # segments (without their position) read once so far, which get no template yet
+
+    def __len__(self) -> int:
+        return len(self.templates)
+
+    def __str__(self) -> str:
+        return "interner: {0} templates for {1} objects, {2} distinct values".format(
+            len(self.templates),
+            sum(template.uses for template in self.templates.values()),
+            sum(len(values) for values in self.values.values()),
+        )
+
+    # convert a single object segment of a level string (without the trailing ;) into an object, the same as
+    # extract_object would
+    def extract_object(self, obj_str: str) -> gdSharedObject:
+        obj = gdSharedObject.__new__(gdSharedObject)
+        object.__setattr__(obj, "_template", None)
+        attrs = obj.__dict__
+        head = obj_str.split(",", 6)
+        key = None
+        if len(head) >= 6 and head[0] == "1" and head[2] == "2" and head[4] == "3":
+            key = head[1] + ";" + (head[6] if len(head) == 7 else "")
+            template = self.templates.get(key)
+            if template != None:
+                attrs.update(template.attrs)
+                attrs["x"] = pl.obj_attr_decoders["2"][1](head[3])  # positions are the objects' own
+                attrs["y"] = pl.obj_attr_decoders["3"][1](head[5])
+                for name in template.lists:
+                    attrs[name] = list(attrs[name])
+                template.uses += 1
+                object.__setattr__(obj, "_template", template)
+                return obj
+
+        fields = obj_str.split(",")
+        shared = {}  # the interned values, which (being copied for lists) no object ever edits
+        decoders = pl.obj_attr_decoders
+        tables = self.values
+        split_obj_str = iter(fields)
+        for raw_key, raw in zip(split_obj_str, split_obj_str):
+            name, decode = decoders.get(raw_key) or pl.resolve_obj_key(raw_key)
+            if name == "x" or name == "y":
+                value = decode(raw)  # positions are the objects' own
+            else:
+                values = tables.get(raw_key)
+                if values == None:
+                    values = tables[raw_key] = {}
+                value = values.get(raw, values)  # values itself stands in for missing, since None is a valid value
+                if value is values:
+                    value = values[raw] = decode(raw)
+            shared[name] = value
+            attrs[name] = list(value) if type(value) == list else value
+        assert "ID" in attrs and "x" in attrs and "y" in attrs
+
+        if key == None or len(shared) * 2 != len(fields):  # a key written twice would move x or y out of the head
+            return obj
+        if key not in self.seen:  # most segments of a level that doesn't repeat itself are only ever seen once
+            self.seen.add(key)
+            return obj
+        self.seen.discard(key)
+        template = self.templates[key] = gdObjectTemplate(shared)
+        template.uses += 1
+        object.__setattr__(obj, "_template", template)
+        return obj
+
+    # the objects of a level string, in level string order
+    def iter_objects(self, lvlstring: str) -> Iterator[gdSharedObject]:
+        for obj_str in pl.iter_object_strings(lvlstring):
+            yield self.extract_object(obj_str)
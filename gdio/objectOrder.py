@@ -0,0 +1,67 @@
+from bisect import bisect_right
+from itertools import filterfalse
+from operator import attrgetter
+from typing import Any
+
+# keeps a gdLevel's objects in (x, y, ID) order without sorting the whole list every time the order is needed.
+# objects added or moved (x, y or ID changed) since the list was last in order are remembered, and restore takes
+# just those out and merges them back in at the places a binary search finds for them, which is one pass over the
+# list instead of a sort computing a key for every object. the whole list is only sorted again after it was replaced
+# or reordered, or once so many objects have changed that merging them back would cost more than that.
+# like gdSpatialIndex, it is kept up to date by the gdLevel holding it (see gdLevel.sort_objs)
+
+order_key = attrgetter("x", "y", "ID")  # the same as spatialIndex.position_key, without a python call per object
+
+
+class gdObjectOrder:
+    resort_fraction = 8  # sort everything again once more than 1/resort_fraction of the objects are out of place
+
+    def __init__(self, objs: list[Any] = ()) -> None:
+        self.reset(objs)
+
+    def __len__(self) -> int:
+        return len(self.misplaced)
+
+    # the list was replaced (or reordered); its order is unknown until the next restore
+    def reset(self, objs: list[Any] = ()) -> None:
+        self.objs = objs
+        self.misplaced: dict[Any, None] = {}  # insertion ordered set of the objects that may be out of place
+        self.in_order = False  # whether every object but the misplaced ones is in order
+
+    def mark(self, obj: Any) -> None:
+        if self.in_order:
+            self.misplaced[obj] = None
+            if len(self.misplaced) * self.resort_fraction > len(self.objs):
+                self.reset(self.objs)
+
+    def add(self, obj: Any) -> None:
+        self.mark(obj)
+
+    # taking objects out never puts the rest out of order
+    def remove(self, obj: Any) -> None:
+        pass
+
+    def update(self, obj: Any, name: str) -> None:
+        if name == "x" or name == "y" or name == "ID":
+            self.mark(obj)
+
+    # put the list back in (x, y, ID) order; objects with the same position and ID keep their order, except that
+    # misplaced ones go after the others
+    def restore(self) -> None:
+        objs = self.objs
+        if not self.in_order:
+            list.sort(objs, key=order_key)
+        elif self.misplaced:
+            kept = list(filterfalse(self.misplaced.__contains__, objs))
+            moved = sorted(filter(self.misplaced.__contains__, objs), key=order_key)
+            merged = []
+            start = 0
+            for obj in moved:
+                end = bisect_right(kept, order_key(obj), start, key=order_key)
+                merged += kept[start:end]
+                merged.append(obj)
+                start = end
+            merged += kept[start:]
+            list.__setitem__(objs, slice(None), merged)
+        self.misplaced.clear()
+        self.in_order = True
@@ -0,0 +1,193 @@
+import threading
+import time
+from typing import Any, Callable
+
+# timing for the stages of the read/edit/write pipeline, e.g. with gdProfiler() as profiler: ... then print(profiler).
+# time spent outside every stage (the script itself) is reported as unaccounted
+
+active = None  # the running gdProfiler, if any
+
+
+class gdProfiler:
+    def __init__(self, codecs: bool = False, callback: Callable[[str, dict[str, Any]], None] = None) -> None:
+        self.time_codecs = codecs
+        self.callback = callback  # called with the stage name and that call's figures (see gdStage.figures)
+        self.stages: dict[str, dict[str, Any]] = {}  # stage name -> totals over every call
+        self.codecs: dict[tuple[str, str], list] = {}  # (attribute, "decode"/"encode") -> [calls, seconds]
+        self.seconds = 0.0
+        self.started = None
+        self.saved_codecs = None
+        self.threads = threading.local()  # .running: the stages currently running on a thread, innermost last
+        self.lock = threading.Lock()
+
+    def __enter__(self) -> "gdProfiler":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        global active
+        if active != None:
+            raise Exception("Another gdProfiler is already running")
+        active = self
+        if self.time_codecs:
+            self.saved_codecs = wrap_codecs(self)
+        self.started = time.perf_counter()
+
+    def stop(self) -> None:
+        global active
+        if active != self:
+            return
+        self.seconds += time.perf_counter() - self.started
+        if self.saved_codecs != None:
+            unwrap_codecs(self.saved_codecs)
+            self.saved_codecs = None
+        active = None
+
+    def running(self) -> list["gdStage"]:
+        if not hasattr(self.threads, "running"):
+            self.threads.running = []
+        return self.threads.running
+
+    def record(self, name: str, figures: dict[str, Any]) -> None:
+        with self.lock:
+            totals = self.stages.get(name)
+            if totals == None:
+                totals = self.stages[name] = dict.fromkeys(figures, 0)
+            totals["calls"] += 1
+            for key, value in figures.items():
+                if key != "calls":
+                    totals[key] += value
+        if self.callback != None:
+            self.callback(name, figures)
+
+    # the timer shared by every call of one attribute's decoder or encoder
+    def codec(self, name: str, direction: str) -> list:
+        return self.codecs.setdefault((name, direction), [0, 0.0])
+
+    def report(self) -> dict[str, Any]:
+        seconds = self.seconds + (time.perf_counter() - self.started if active == self else 0.0)
+        return {
+            "seconds": seconds,
+            "unaccounted": seconds - sum(totals["seconds"] for totals in self.stages.values()),
+            "stages": {name: dict(totals) for name, totals in self.stages.items()},
+            "codecs": {
+                "{0} ({1})".format(*key): {"calls": calls, "seconds": elapsed}
+                for key, (calls, elapsed) in sorted(self.codecs.items(), key=lambda item: -item[1][1])
+                if calls
+            },
+        }
+
+    def __str__(self) -> str:
+        report = self.report()
+        row = "{0:<32}{calls:>7}{seconds:>10.3f}{objects:>11}{attributes:>12}{bytes_in:>12}{bytes_out:>12}"
+        lines = [
+            "{0:<32}{1:>7}{2:>10}{3:>11}{4:>12}{5:>12}{6:>12}".format(
+                "stage", "calls", "seconds", "objects", "attributes", "bytes in", "bytes out"
+            )
+        ]
+        for name, totals in sorted(report["stages"].items(), key=lambda item: -item[1]["seconds"]):
+            lines.append(row.format(name, **totals))
+        lines.append("{0:<32}{1:>17.3f}".format("unaccounted (outside gd-io)", report["unaccounted"]))
+        lines.append("{0:<32}{1:>17.3f}".format("total", report["seconds"]))
+        for name, codec in list(report["codecs"].items())[:10]:
+            lines.append("{0:<32}{calls:>7}{seconds:>10.3f}".format("  " + name, **codec))
+        return "\n".join(lines)
+
+
+# one call of a stage, timed by its with block; the code inside fills in what it went through with count.
+# a stage's time leaves out the stages run inside it
+class gdStage:
+    def __init__(self, profiler: gdProfiler, name: str) -> None:
+        self.profiler = profiler
+        self.name = name
+        self.figures = {"calls": 1, "seconds": 0.0, "objects": 0, "attributes": 0, "bytes_in": 0, "bytes_out": 0}
+
+    def __enter__(self) -> "gdStage":
+        self.inner = 0.0  # time spent in stages run inside this one
+        self.profiler.running().append(self)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        elapsed = time.perf_counter() - self.started
+        running = self.profiler.running()
+        running.pop()
+        if running:
+            running[-1].inner += elapsed
+        self.figures["seconds"] = elapsed - self.inner
+        self.profiler.record(self.name, self.figures)
+
+    def count(self, objects: int = 0, attributes: int = 0, bytes_in: int = 0, bytes_out: int = 0) -> None:
+        self.figures["objects"] += objects
+        self.figures["attributes"] += attributes
+        self.figures["bytes_in"] += bytes_in
+        self.figures["bytes_out"] += bytes_out
+
+    # objects and attributes in the object section of a level string (every segment is "key,value,...;")
+    def count_segments(self, lvlstring: str) -> None:
+        start = lvlstring.find(";") + 1
+        objects = lvlstring.count(";", start) if start > 0 else 0
+        self.count(objects=objects, attributes=(lvlstring.count(",", start) + objects) // 2 if objects else 0)
+
+
+# stands in for gdStage while nothing is being profiled
+class gdIdleStage:
+    def __enter__(self) -> "gdIdleStage":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        pass
+
+    def count(self, objects: int = 0, attributes: int = 0, bytes_in: int = 0, bytes_out: int = 0) -> None:
+        pass
+
+    def count_segments(self, lvlstring: str) -> None:
+        pass
+
+
+idle_stage = gdIdleStage()
+
+
+# the with block to time a stage in
+def stage(name: str) -> gdStage | gdIdleStage:
+    return idle_stage if active == None else gdStage(active, name)
+
+
+# swap every object attribute decoder and encoder for a timed version, returning the originals (in this process only,
+# so the workers of extract_level(..., workers=...) aren't timed)
+def wrap_codecs(profiler: gdProfiler) -> tuple[dict, dict]:
+    import gdio.processLevelData as pl
+
+    saved = (dict(pl.obj_attr_decoders), dict(pl.obj_attr_encoders))
+    for key, (name, decode) in saved[0].items():
+        pl.obj_attr_decoders[key] = (name, timed(decode, profiler.codec(name, "decode")))
+    for name, encode in saved[1].items():
+        pl.obj_attr_encoders[name] = timed(encode, profiler.codec(name, "encode"))
+    pl.unmapped_obj_keys.clear()  # may hold decoders from obj_attr_decoders
+    return saved
+
+
+def unwrap_codecs(saved: tuple[dict, dict]) -> None:
+    import gdio.processLevelData as pl
+
+    pl.obj_attr_decoders.update(saved[0])
+    pl.obj_attr_encoders.update(saved[1])
+    pl.unmapped_obj_keys.clear()
+
+
+# func, adding its calls and time to timer ([calls, seconds]); the time includes the timer's own overhead, so compare
+# codecs against each other rather than against stage times
+def timed(func: Callable[[Any], Any], timer: list) -> Callable[[Any], Any]:
+    perf_counter = time.perf_counter
+
+    def call(value: Any) -> Any:
+        started = perf_counter()
+        result = func(value)
+        timer[1] += perf_counter() - started
+        timer[0] += 1
+        return result
+
+    return call
@@ -1,11 +1,30 @@
-from typing import Callable, Any
-import typing, types
+from typing import Callable, Any, Iterable, Iterator, BinaryIO
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import gc
+import itertools
+import math
+import os
 import re
-from gdio.attributeData import obj_attr_map, col_attr_map, special_col_map, obj_attr_transform, col_attr_transform
+from gdio.spatialIndex import gdSpatialIndex
+from gdio.attributeIndex import gdAttributeIndex
+from gdio.objectOrder import gdObjectOrder, order_key
+from gdio.pipelineProfiler import stage
+from gdio.attributeData import (
+    special_col_map,
+    obj_attr_ids,
+    obj_attr_codecs,
+    obj_attr_keys,
+    col_attr_map,
+    col_attr_ids,
+    col_attr_codecs,
+    col_attr_keys,
+)
 
 
 # representing an object in GD
 class gdObject:
+    __slots__ = ("__dict__", "_owner")  # _owner is the gdLevel watching the object for changes, if any (see gdWatched)
     ID = int(0)
     x = 0.0
     y = 0.0
@@ -14,6 +33,7 @@ class gdObject:
     def __init__(self, vals: dict[int | str, Any]) -> None:
         for key in vals:
             value = vals[key]
+            mapkey = key
 
             if type(key) == str:
                 if re.match(r"^kA\d+$", key) != None:
@@ -21,77 +41,212 @@ class gdObject:
                     value = compress_type(value) != 0
                 else:
                     # if key is already set to a attribute name, convert it back to its numerical form for translation
-                    if key in map(lambda entry: entry.name, obj_attr_map.values()):
-                        key = next(filter(lambda attr_key: obj_attr_map[attr_key].name == key, obj_attr_map))
+                    if key in obj_attr_ids:
+                        mapkey = obj_attr_ids[key]
                     else:
                         raise Exception("Provided key name ({}) not found in list of permitted attributes".format(key))
             else:
-                # if a decode function exists in obj_attr_transform, decode the value accordingly
+                # if a decode function exists for the attribute, decode the value accordingly
                 # note: this should only be used on importing from a level string.
                 # when creating an object manually, don't use numerical keys; you might see undesirable behavior
-                if compress_type(key) in obj_attr_transform:
-                    value = obj_attr_transform[compress_type(key)]["decode"](vals[key])
+                mapkey = compress_type(key)
+                if mapkey in obj_attr_codecs and obj_attr_codecs[mapkey].decode != None:
+                    value = obj_attr_codecs[mapkey].decode(value)
 
             # if numerical key exists in obj_attr_map, convert it into its mapped name
-            if compress_type(key) in obj_attr_map:
-                setattr(
-                    self,
-                    obj_attr_map[compress_type(key)].name,
-                    obj_attr_map[compress_type(key)].type(value),
-                )
+            if mapkey in obj_attr_codecs:
+                codec = obj_attr_codecs[mapkey]
+                self.__dict__[codec.name] = codec.cast(value)
             else:
-                setattr(self, str(key), value)
+                self.__dict__[str(key)] = value
         assert set(["ID", "x", "y"]).issubset(self.__dict__)
 
+    # copies/pickles carry the attributes only, not the level the object belongs to
+    def __getstate__(self) -> dict[str, Any]:
+        return self.__dict__
+
     # for human readable printing
     def __str__(self) -> str:
-        return "obj: { " + ", ".join(["{0}: {1}".format(key, str(getattr(self, key))) for key in self.__dict__]) + " }"
+        return "obj: { " + ", ".join(["{0}: {1}".format(key, str(value)) for key, value in self.attributes().items()]) + " }"
+
+    # every attribute of the object by name, in the order they're written out.
+    # this is the object's __dict__; kinds of objects that don't keep all their attributes there override it
+    def attributes(self) -> dict[str, Any]:
+        return self.__dict__
 
     # for printing into GD's internal format
-    def compress(self) -> str:
-        obj_attrs = []
-        for key in self.__dict__:
-            value = getattr(self, key)
-
-            # if the name of an attribute exists in obj_attr_map, convert it back to its number counterpart
-            # else leave as unchanged key val
-            mapkey = next((mkey for mkey in obj_attr_map if obj_attr_map[mkey].name == key), key)
-            if mapkey in obj_attr_map:
-                if type(obj_attr_map[mapkey].type) == types.GenericAlias:
-                    i = 0
-                    aliased_type: types.GenericAlias = obj_attr_map[mapkey].type
-                    try:
-                        if aliased_type.__origin__ == tuple:
-                            for i, indexed_type in enumerate(typing.get_args(aliased_type)):
-                                assert type(value[i]) == indexed_type
-                        elif aliased_type.__origin__ == list:
-                            for i in range(len(value)):
-                                assert type(value[i]) == typing.get_args(aliased_type)[0]
-                    except AssertionError:
-                        print(
-                            "Warning: Index {2} of value was {3} did not match desired type ({4}) ({0} = {1})".format(
-                                key, value, i, type(value[i]), typing.get_args(aliased_type)[i]
-                            )
+    # strict checks every attribute against the types in obj_attr_map first, printing a warning on mismatches
+    def compress(self, strict: bool = False) -> str:
+        if strict:
+            self.validate()
+        return ",".join(
+            [(obj_attr_encoders.get(key) or resolve_obj_encoder(key))(value) for key, value in self.attributes().items()]
+        )
+
+    # print a warning for every attribute whose value doesn't match the type it has in obj_attr_map
+    def validate(self) -> None:
+        for key, value in self.attributes().items():
+            if key not in obj_attr_ids:
+                continue
+            codec = obj_attr_codecs[obj_attr_ids[key]]
+            if codec.args:
+                i = 0
+                try:
+                    if codec.cast == tuple:
+                        for i, indexed_type in enumerate(codec.args):
+                            assert type(value[i]) == indexed_type
+                    elif codec.cast == list:
+                        for i in range(len(value)):
+                            assert type(value[i]) == codec.args[0]
+                except AssertionError:
+                    print(
+                        "Warning: Index {2} of value was {3} did not match desired type ({4}) ({0} = {1})".format(
+                            key, value, i, type(value[i]), codec.args[i] if codec.cast == tuple else codec.args[0]
                         )
-                else:
-                    try:
-                        assert type(value) == obj_attr_map[mapkey].type
-                    except AssertionError:
-                        print(
-                            "Warning: Type of value was {2}, did not match desired type ({3}) ({0} = {1})".format(
-                                key, value, type(value), obj_attr_map[mapkey].type
-                            )
+                    )
+            else:
+                try:
+                    assert type(value) == codec.type
+                except AssertionError:
+                    print(
+                        "Warning: Type of value was {2}, did not match desired type ({3}) ({0} = {1})".format(
+                            key, value, type(value), codec.type
                         )
+                    )
 
-            if type(value) == bool:
-                value = 1 if value else 0
 
-            # if we decoded it above, encode it back again
-            if mapkey in obj_attr_transform:
-                value = obj_attr_transform[mapkey]["encode"](value)
+# an object read from a level string that only decodes its attributes when they're first accessed.
+# ID, x and y are decoded straight away (levels are ordered by them); everything else is kept as the raw string
+# until it's read. an object that was never changed compresses to exactly the segment it was read from.
+# setting or deleting an attribute decodes the rest and from then on the object behaves like a regular gdObject.
+# note: __dict__ only holds the attributes decoded so far; use attributes() to get all of them
+class gdLazyObject(gdObject):
+    __slots__ = ("_raw", "_source")
+
+    # create obj from a single object segment of a level string (without the trailing ;)
+    def __init__(self, obj_str: str) -> None:
+        object.__setattr__(self, "_raw", obj_str)
+        object.__setattr__(self, "_source", None)
+        head = obj_str.split(",", 6)
+        if len(head) >= 6 and head[0] == "1" and head[2] == "2" and head[4] == "3":
+            self.__dict__.update(ID=int(head[1]), x=float(head[3]), y=float(head[5]))
+        else:
+            for name in ("ID", "x", "y"):
+                if name in self.source():
+                    decode, raw = self._source[name]
+                    self.__dict__[name] = decode(raw)
+        assert "ID" in self.__dict__ and "x" in self.__dict__ and "y" in self.__dict__
+
+    # name -> (decoder, raw value) for every attribute in the original segment, in order; split on first use
+    def source(self) -> dict[str, tuple[Callable[[str], Any], str]]:
+        if self._source == None:
+            source = {}
+            split_obj_str = iter(self._raw.split(","))
+            for key, value in zip(split_obj_str, split_obj_str):
+                name, decode = obj_attr_decoders.get(key) or resolve_obj_key(key)
+                source[name] = (decode, value)
+            object.__setattr__(self, "_source", source)
+        return self._source
+
+    def __getattr__(self, name: str) -> Any:
+        # changed objects are fully decoded, so anything missing really is missing
+        if name.startswith("_") or self._raw == None or name not in self.source():
+            raise AttributeError(name)
+        decode, raw = self._source[name]
+        value = self.__dict__[name] = decode(raw)
+        return value
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        self.detach()
+        gdObject.__setattr__(self, name, value)
 
-            obj_attrs.append("{0},{1}".format(mapkey, value))
-        return ",".join(obj_attrs)
+    def __delattr__(self, name: str) -> None:
+        self.detach()
+        gdObject.__delattr__(self, name)
+
+    def __reduce__(self) -> tuple:
+        if self._raw != None and not self.changed_in_place():
+            return (gdLazyObject, (self._raw,))
+        return (detached_object, (dict(self.attributes()),))
+
+    def attributes(self) -> dict[str, Any]:
+        if self._raw != None:
+            attrs = self.__dict__
+            source = self.source()
+            if len(attrs) != len(source) or list(attrs) != list(source):  # not all decoded, or decoded out of order
+                decoded = {name: attrs[name] if name in attrs else decode(raw) for name, (decode, raw) in source.items()}
+                attrs.clear()
+                attrs.update(decoded)
+        return self.__dict__
+
+    # decode everything and drop the original segment, e.g. before the object is changed
+    def detach(self) -> None:
+        if self._raw != None:
+            self.attributes()
+            object.__setattr__(self, "_raw", None)
+            object.__setattr__(self, "_source", None)
+
+    # whether a decoded list (or other mutable value) was edited in place, e.g. obj.groups.append(...)
+    def changed_in_place(self) -> bool:
+        if self._source == None:  # only ID/x/y were decoded
+            return False
+        return any(
+            type(value) in (list, dict, set, bytearray) and value != self._source[name][0](self._source[name][1])
+            for name, value in self.__dict__.items()
+        )
+
+    # an unchanged object is still checked when strict is set, which decodes it
+    def compress(self, strict: bool = False) -> str:
+        if self._raw != None:
+            if self._source == None or not self.changed_in_place():
+                if strict:
+                    self.validate()
+                return self._raw
+            self.detach()
+        return gdObject.compress(self, strict)
+
+
+# a plain gdObject (or object of class cls) with the given attributes, not watched by any level
+# (used when copying objects that aren't plain gdObjects)
+def detached_object(attrs: dict[str, Any], cls: type = gdObject) -> gdObject:
+    obj = cls.__new__(cls)
+    obj.__dict__.update(attrs)
+    return obj
+
+
+# what objects turn into while a gdLevel is watching them (see gdLevel.watch): setting or deleting an attribute
+# lets the level know, so it can keep its indexes up to date. watching swaps an object's class for a subclass of
+# this and its own class, and unwatching swaps it back, so objects no level is watching set attributes at full speed
+class gdWatched:
+    __slots__ = ()
+    unwatched_class: type
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        self._owner.object_changed(self, name)
+
+    def __delattr__(self, name: str) -> None:
+        super().__delattr__(name)
+        self._owner.object_changed(self, name)
+
+    # copies/pickles are of the object's own class, and not watched
+    def __reduce__(self) -> tuple:
+        cls = self.unwatched_class
+        if cls.__reduce__ != object.__reduce__:
+            return cls.__reduce__(self)
+        return (detached_object, (self.__getstate__(), cls))
+
+
+watched_classes: dict[type, type] = {}  # class -> its watched counterpart (which maps to itself), made on first use
+
+
+def watched_class(cls: type) -> type:
+    watched = watched_classes.get(cls)
+    if watched == None:
+        namespace = {"__slots__": (), "__module__": cls.__module__, "unwatched_class": cls}
+        watched = type(cls.__name__, (gdWatched, cls), namespace)
+        watched_classes[cls] = watched_classes[watched] = watched
+    return watched
 
 
 # representing a color in GD
@@ -110,15 +265,13 @@ class gdColor:
         for key in vals:
             # if a decode function exists in col_attr_transform, decode the value accordingly
             value = vals[key]
-            if compress_type(key) in col_attr_transform:
-                value = col_attr_transform[compress_type(key)]["decode"](vals[key])
+            mapkey = compress_type(key)
+            if mapkey in col_attr_codecs and col_attr_codecs[mapkey].decode != None:
+                value = col_attr_codecs[mapkey].decode(value)
             # if numerical key exists in col_attr_map, convert it into its mapped name
-            if compress_type(key) in col_attr_map:
-                setattr(
-                    self,
-                    col_attr_map[compress_type(key)].name,
-                    col_attr_map[compress_type(key)].type(value),
-                )
+            if mapkey in col_attr_codecs:
+                codec = col_attr_codecs[mapkey]
+                setattr(self, codec.name, codec.cast(value))
             else:
                 setattr(self, str(key), value)
         assert set([col_attr_map[i].name for i in [1, 2, 3, 6]]).issubset(self.__dict__)
@@ -143,45 +296,379 @@ class gdColor:
 
     # for printing into GD's internal format
     def compress(self) -> str:
-        col_attrs = []
-        for key in self.__dict__:
-            value = getattr(self, key)
-            if type(value) == bool:
-                value = 1 if value else 0
+        return "_".join(
+            [(col_attr_encoders.get(key) or resolve_col_encoder(key))(value) for key, value in self.__dict__.items()]
+        )
+
+
+# the objs list of a gdLevel; a regular list that tells its level about objects being added or removed
+class gdObjectList(list):
+    def __init__(self, level: "gdLevel", objs: Iterable[gdObject] = ()) -> None:
+        super().__init__(objs)
+        self.level = level
+
+    def added(self, objs: list[gdObject]) -> None:
+        self.level.objects_added(objs)
+
+    def removed(self, objs: list[gdObject]) -> None:
+        self.level.objects_removed(objs)
+
+    def reordered(self) -> None:
+        self.level.objects_reordered()
+
+    # rebuilt from the level and the objects, so unpickling doesn't go through the notifying methods below
+    def __reduce__(self) -> tuple:
+        return (type(self), (self.level, list(self)))
 
-            # if the name of an attribute exists in col_attr_map, convert it back to its number counterpart
-            # else leave as unchanged key val
-            mapkey = next((mkey for mkey in col_attr_map if col_attr_map[mkey].name == key), key)
+    def append(self, obj: gdObject) -> None:
+        super().append(obj)
+        self.added([obj])
 
-            # if we decoded it above, encode it back again
-            if mapkey in col_attr_transform:
-                value = col_attr_transform[mapkey]["encode"](value)
+    def extend(self, objs: Iterable[gdObject]) -> None:
+        objs = list(objs)
+        super().extend(objs)
+        self.added(objs)
 
-            col_attrs.append("{0}_{1}".format(mapkey, value))
-        return "_".join(col_attrs)
+    def __iadd__(self, objs: Iterable[gdObject]) -> "gdObjectList":
+        self.extend(objs)
+        return self
+
+    def __imul__(self, n: int) -> "gdObjectList":
+        if n <= 0:
+            self.clear()
+        else:
+            self.extend(list(self) * (n - 1))
+        return self
+
+    def insert(self, index: int, obj: gdObject) -> None:
+        super().insert(index, obj)
+        self.added([obj])
+
+    def remove(self, obj: gdObject) -> None:
+        super().remove(obj)
+        self.removed([obj])
+
+    def pop(self, index: int = -1) -> gdObject:
+        obj = super().pop(index)
+        self.removed([obj])
+        return obj
+
+    def clear(self) -> None:
+        objs = list(self)
+        super().clear()
+        self.removed(objs)
+
+    def __setitem__(self, index: int | slice, obj: gdObject | Iterable[gdObject]) -> None:
+        if type(index) == slice:
+            old, obj = self[index], list(obj)
+        else:
+            old = [self[index]]
+        super().__setitem__(index, obj)
+        self.removed(old)
+        self.added(obj if type(index) == slice else [obj])
+
+    def __delitem__(self, index: int | slice) -> None:
+        old = self[index] if type(index) == slice else [self[index]]
+        super().__delitem__(index)
+        self.removed(old)
+
+    # remove all of objs in a single pass over the list, rather than one search per object like remove
+    def remove_all(self, objs: Iterable[gdObject]) -> None:
+        doomed = {id(obj) for obj in objs}
+        old = [obj for obj in self if id(obj) in doomed]
+        super().__setitem__(slice(None), [obj for obj in self if id(obj) not in doomed])
+        self.removed(old)
+
+    def sort(self, *, key: Callable[[gdObject], Any] = None, reverse: bool = False) -> None:
+        super().sort(key=key, reverse=reverse)
+        self.reordered()
+
+    def reverse(self) -> None:
+        super().reverse()
+        self.reordered()
+
+
+# the cols list of a gdLevel; keeps the level's color channel lookup up to date in the same way
+class gdColorList(gdObjectList):
+    def added(self, cols: list[gdColor]) -> None:
+        self.level.colors_added(cols)
+
+    def removed(self, cols: list[gdColor]) -> None:
+        self.level.colors_removed(cols)
+
+    # the channel lookup doesn't depend on the order
+    def reordered(self) -> None:
+        pass
 
 
 # representing a level in GD as a collection of colors and objects
 class gdLevel:
     def __init__(self, objs: list[gdObject], cols: list[gdColor], headers: str) -> None:
+        self.indexes: list[Any] = []  # kept up to date as objects are added, removed and changed
+        self.colors_by_id: dict[int, gdColor] | None = None  # color channel lookup, built on first use
         self.objs = objs
-        self.objs.sort(key=lambda obj: (getattr(obj, "x"), getattr(obj, "y"), getattr(obj, "ID")))
+        self.sort_objs()
         self.cols = cols
         self.cols.sort(key=lambda col: col.ID)
         self.headers = headers
 
+    # the level's objects; adding to or removing from the list keeps the level's indexes up to date
+    @property
+    def objs(self) -> "gdObjectList":
+        return self._objs
+
+    @objs.setter
+    def objs(self, objs: list[gdObject]) -> None:
+        if self.indexes:
+            self.unwatch(self._objs)
+        self._objs = gdObjectList(self, objs)
+        if self.indexes:
+            self.watch(self._objs)
+            for index in self.indexes:
+                index.reset(self._objs)
+
+    # the level's color channels; adding to or removing from the list keeps the channel lookup up to date
+    @property
+    def cols(self) -> gdColorList:
+        return self._cols
+
+    @cols.setter
+    def cols(self, cols: list[gdColor]) -> None:
+        self._cols = gdColorList(self, cols)
+        self.colors_by_id = None
+
+    # indexes aren't carried over into copies/pickles; they are rebuilt on first use
+    def __getstate__(self) -> dict[str, Any]:
+        return dict(self.__dict__, indexes=[], colors_by_id=None)
+
+    # start keeping an index (anything with reset/add/remove/update, see gdSpatialIndex) up to date with the objects
+    def add_index(self, index: Any) -> None:
+        if not self.indexes:
+            self.watch(self.objs)
+        index.reset(self.objs)
+        self.indexes.append(index)
+
+    # objects only report changes to their level while it has indexes to keep up to date (see gdWatched)
+    def watch(self, objs: Iterable[gdObject]) -> None:
+        for obj in objs:
+            object.__setattr__(obj, "_owner", self)
+            object.__setattr__(obj, "__class__", watched_class(type(obj)))
+
+    def unwatch(self, objs: Iterable[gdObject]) -> None:
+        for obj in objs:
+            if getattr(obj, "_owner", None) is self:
+                object.__setattr__(obj, "_owner", None)
+                object.__setattr__(obj, "__class__", type(obj).unwatched_class)
+
+    def objects_added(self, objs: list[gdObject]) -> None:
+        if self.indexes:
+            self.watch(objs)
+            for index in self.indexes:
+                for obj in objs:
+                    index.add(obj)
+
+    def objects_removed(self, objs: list[gdObject]) -> None:
+        if self.indexes:
+            self.unwatch(objs)
+            for index in self.indexes:
+                for obj in objs:
+                    index.remove(obj)
+
+    def object_changed(self, obj: gdObject, name: str) -> None:
+        for index in self.indexes:
+            index.update(obj, name)
+
+    # the objects were sorted or reversed in place, which only changes where they are in the list
+    def objects_reordered(self) -> None:
+        for index in self.indexes:
+            if type(index) == gdObjectOrder:
+                index.reset(self.objs)
+
+    def colors_added(self, cols: list[gdColor]) -> None:
+        if self.colors_by_id != None:
+            for col in cols:
+                self.colors_by_id.setdefault(col.ID, col)
+
+    def colors_removed(self, cols: list[gdColor]) -> None:
+        self.colors_by_id = None  # another channel with the same ID may take its place; rebuilt on next use
+
+    # the spatial index over the objects' x/y positions, built on first use and kept up to date afterwards
+    def spatial_index(self) -> gdSpatialIndex:
+        index = next((index for index in self.indexes if type(index) == gdSpatialIndex), None)
+        if index == None:
+            index = gdSpatialIndex()
+            self.add_index(index)
+        return index
+
+    # what keeps the objects in (x, y, ID) order (see gdObjectOrder), built on first use and kept up to date afterwards
+    def object_order(self) -> gdObjectOrder:
+        index = next((index for index in self.indexes if type(index) == gdObjectOrder), None)
+        if index == None:
+            index = gdObjectOrder()
+            self.add_index(index)
+        return index
+
+    # put the objects back in (x, y, ID) order. once the level keeps track of its order (track, or see object_order),
+    # only the objects added or moved since they were last in order are put back in place; until then, the whole list
+    # is sorted (keeping track means hearing about every change made to an object, which slows those down a little)
+    def sort_objs(self, track: bool = False) -> None:
+        with stage("sort objects") as timing:
+            if track:
+                order = self.object_order()
+            else:
+                order = next((index for index in self.indexes if type(index) == gdObjectOrder), None)
+            if order == None:
+                list.sort(self.objs, key=order_key)
+                timing.count(objects=len(self.objs))
+            else:
+                timing.count(objects=len(order) if order.in_order else len(self.objs))
+                order.restore()
+
+    # an inverted index from the values of the given attributes to the objects holding them, built on first use
+    # and kept up to date afterwards (see gdAttributeIndex)
+    def attribute_index(self, *names: str) -> gdAttributeIndex:
+        index = next((index for index in self.indexes if type(index) == gdAttributeIndex and index.names == names), None)
+        if index == None:
+            index = gdAttributeIndex(names)
+            self.add_index(index)
+        return index
+
+    # objects in a group, in (x, y, ID) order
+    def objects_in_group(self, group: int) -> list[gdObject]:
+        return self.attribute_index("groups").lookup(group)
+
+    # objects using a color channel, either as their main/secondary color or as the target of a color trigger
+    def objects_with_color(self, channel: int) -> list[gdObject]:
+        return self.attribute_index("color", "color-secondary", "trigger-color-target").lookup(channel)
+
+    # triggers targeting a group, in (x, y, ID) order
+    def triggers_targeting(self, group: int) -> list[gdObject]:
+        return self.attribute_index("trigger-group-target").lookup(group)
+
+    # a patch (see levelPatch.py) of every object added, removed or changed since the level was read with
+    # extract_level(lvlstring, track_changes=True); apply_patch(lvlstring, lvl.changes()) gives the new level string
+    # while copying every untouched object over from lvlstring as it was
+    def changes(self) -> "gdLevelPatch":
+        from gdio.levelPatch import gdChangeTracker
+
+        tracker = next((index for index in self.indexes if type(index) == gdChangeTracker), None)
+        if tracker == None:
+            raise Exception("Level changes are only tracked for levels read with extract_level(..., track_changes=True)")
+        return tracker.patch()
+
+    # a patch (see levelPatch.py) turning this level into other, which applies to this level's compress()
+    def diff(self, other: "gdLevel") -> "gdLevelPatch":
+        from gdio.levelPatch import diff_levels
+
+        return diff_levels(self, other)
+
+    # objects with x0 <= x <= x1 and y0 <= y <= y1, in (x, y, ID) order
+    def objects_in_rect(self, x0: float, y0: float, x1: float, y1: float) -> list[gdObject]:
+        return self.spatial_index().in_rect(x0, y0, x1, y1)
+
+    # objects with x0 <= x <= x1, in (x, y, ID) order
+    def objects_in_x_range(self, x0: float, x1: float) -> list[gdObject]:
+        return self.spatial_index().in_x_range(x0, x1)
+
+    # objects within radius units of (x, y), in (x, y, ID) order
+    def objects_within(self, x: float, y: float, radius: float) -> list[gdObject]:
+        return self.spatial_index().in_radius(x, y, radius)
+
+    # the k objects closest to (x, y), nearest first
+    def nearest_objects(self, x: float, y: float, k: int = 1) -> list[gdObject]:
+        return self.spatial_index().nearest(x, y, k)
+
+    # exact duplicates: objects stacked on the same spot with every attribute the same, which the game still places,
+    # draws and updates once for every copy. each list holds copies of one object in level order, the first of them
+    # being the one remove_duplicate_objects keeps; sorts the level first (see sort_objs)
+    def duplicate_objects(self) -> list[list[gdObject]]:
+        self.sort_objs()
+        duplicates = []
+        # only objects with the same (x, y, ID) can match, and those are next to each other
+        for key, stack in itertools.groupby(self.objs, key=order_key):
+            stack = list(stack)
+            if len(stack) == 1:
+                continue
+            copies: list[list[gdObject]] = []
+            for obj in {id(obj): obj for obj in stack}.values():  # the same object added twice isn't a copy of itself
+                attrs = obj.attributes()
+                match = next((group for group in copies if group[0].attributes() == attrs), None)
+                if match == None:
+                    copies.append([obj])
+                else:
+                    match.append(obj)
+            duplicates += [group for group in copies if len(group) > 1]
+        return duplicates
+
+    # remove every copy but the first of every set of exact duplicates, returning how many objects were removed
+    def remove_duplicate_objects(self) -> int:
+        doomed = [obj for group in self.duplicate_objects() for obj in group[1:]]
+        if doomed:
+            self.objs.remove_all(doomed)
+        return len(doomed)
+
+    # the objects meeting every given condition, as a lazy query (see levelQuery.py), e.g.
+    # lvl.query(ID=in_(1, 2, 3), x=between(0, 3000), groups=contains(42)).update(color=4)
+    def query(self, conditions: dict[str, Any] = None, **kwargs: Any) -> "gdQuery":
+        from gdio.levelQuery import gdQuery
+
+        return gdQuery(self, conditions, **kwargs)
+
     # for human readable printing
     def __str__(self) -> str:
         return self.cols_printable() + "\n" + self.objs_printable()
 
     # for printing into GD's internal format
-    def compress(self) -> str:
-        return (
-            "kS38,"
-            + "".join([col.compress() + "|" for col in self.cols])
-            + self.headers
-            + "".join([obj.compress() + ";" for obj in self.objs])
-        )
+    # workers > 1 (or None for one per core) encodes large levels in a process pool, see compress_objects_parallel
+    def compress(self, strict: bool = False, workers: int | None = 1) -> str:
+        with stage("compress") as timing:
+            lvlstring = (
+                "kS38,"
+                + "".join([col.compress() + "|" for col in self.cols])
+                + self.headers
+                + compress_objects_parallel(self.objs, strict, workers)
+            )
+            timing.count_segments(lvlstring)
+            timing.count(bytes_out=len(lvlstring))
+        return lvlstring
+
+    # the same as compress, as a series of utf-8 encoded chunks of roughly chunk_size bytes (e.g. for gzip)
+    def compress_iter(self, strict: bool = False, chunk_size: int = 1 << 16) -> Iterator[bytes]:
+        batch = ["kS38,"] + [col.compress() + "|" for col in self.cols] + [self.headers]
+        objs = iter(self.objs)
+        done = False
+        while not done:
+            # timed chunk by chunk, leaving out whatever the consumer does in between
+            with stage("compress") as timing:
+                start = len(batch)
+                size = 0
+                done = True
+                for obj in objs:
+                    obj_str = obj.compress(strict)
+                    batch.append(obj_str)
+                    batch.append(";")
+                    size += len(obj_str) + 1
+                    if size >= chunk_size:
+                        done = False
+                        break
+                chunk = "".join(batch).encode("utf-8")
+                timing.count(objects=(len(batch) - start) // 2, bytes_out=len(chunk))
+            batch = []
+            if chunk:
+                yield chunk
+
+    # write the compressed level straight into a writable binary stream (e.g. io.BytesIO), returning the bytes written
+    def compress_to(self, stream: BinaryIO, strict: bool = False, chunk_size: int = 1 << 16) -> int:
+        written = 0
+        for chunk in self.compress_iter(strict, chunk_size):
+            stream.write(chunk)
+            written += len(chunk)
+        return written
+
+    # the objects passing filter (all of them without one), for transforming together, e.g.
+    # lvl.select(lambda obj: 10 in getattr(obj, "groups", [])).translate(30, 0).rotate_about(0, 0, 90)
+    def select(self, filter: Callable[[gdObject], bool] = None) -> "gdSelection":
+        return gdSelection([obj for obj in self.objs if filter == None or filter(obj)])
 
     # modifying all objects in place
     def map(self, func: Callable[[gdObject], None], filter: Callable[[gdObject], bool] = None) -> None:
@@ -191,7 +678,7 @@ class gdLevel:
 
     # returns a string of exclusively the objects within the level
     def objs_printable(self, filter: Callable[[gdObject], bool] = None) -> str:
-        self.objs.sort(key=lambda obj: (getattr(obj, "x"), getattr(obj, "y"), getattr(obj, "ID")))
+        self.sort_objs(track=True)  # printed again and again while editing, so only sort what changed in between
         return "\n".join([obj.__str__() for obj in self.objs if filter == None or filter(obj)])
 
     # returns a string of exclusively the colors within the level
@@ -201,7 +688,15 @@ class gdLevel:
 
     # returns the information for a specific color channel if available, else returns the default white
     def get_color_channel(self, val: int) -> gdColor:
-        next_col = next(filter(lambda col: col.ID == val, self.cols), None)
+        if self.colors_by_id == None:
+            self.colors_by_id = {}
+            self.colors_added(self.cols)
+        next_col = self.colors_by_id.get(val)
+        if next_col == None or next_col.ID != val:  # not there, or a channel was renumbered since it was built
+            stale = next_col != None
+            next_col = next(filter(lambda col: col.ID == val, self.cols), None)
+            if stale or next_col != None:
+                self.colors_by_id = None
         if next_col != None:
             return next_col
         else:  # if no color found, return a default value
@@ -224,26 +719,361 @@ class gdLevel:
             )
 
 
+# a set of objects moved, rotated, scaled or mirrored as one. every operation is a single pass over the selection
+# and returns the selection, so operations can be chained. positions stay floats and rotations stay ints where the
+# result is a whole number, so compress writes them the way it would have written them for a level read from GD;
+# rotations/scales/flip flags are only added to objects where they end up different from the game's default
+class gdSelection:
+    def __init__(self, objs: Iterable[gdObject]) -> None:
+        self.objs = list(objs)
+
+    def __len__(self) -> int:
+        return len(self.objs)
+
+    def __iter__(self) -> Iterator[gdObject]:
+        return iter(self.objs)
+
+    def translate(self, dx: float = 0.0, dy: float = 0.0) -> "gdSelection":
+        return self.transform(lambda x, y: (x + dx, y + dy))
+
+    # rotates clockwise (the direction of GD's rotation attribute) by degrees around (cx, cy)
+    def rotate_about(self, cx: float, cy: float, degrees: float) -> "gdSelection":
+        cos, sin = turn(degrees)
+        return self.transform(
+            lambda x, y: (cx + (x - cx) * cos + (y - cy) * sin, cy - (x - cx) * sin + (y - cy) * cos),
+            [("rotation", 0, lambda rotation: rotation + degrees)],
+        )
+
+    # scales positions relative to (cx, cy), and the objects themselves, by factor
+    def scale_about(self, cx: float, cy: float, factor: float) -> "gdSelection":
+        return self.transform(
+            lambda x, y: (cx + (x - cx) * factor, cy + (y - cy) * factor),
+            [("scale", 1.0, lambda scale: scale * factor)],
+        )
+
+    # mirrors across the vertical line x = cx and/or the horizontal line y = cy, flipping the objects to match
+    def mirror(self, cx: float | None = None, cy: float | None = None) -> "gdSelection":
+        adjustments = []
+        if cx != None:
+            adjustments += [("flip-horizontal", False, lambda flip: not flip), ("rotation", 0, lambda rotation: -rotation)]
+        if cy != None:
+            adjustments += [("flip-vertical", False, lambda flip: not flip), ("rotation", 0, lambda rotation: -rotation)]
+        return self.transform(
+            lambda x, y: (x if cx == None else 2 * cx - x, y if cy == None else 2 * cy - y),
+            adjustments,
+        )
+
+    # the single pass behind every operation: move(x, y) gives each object's new position, and every
+    # (name, default, func) in adjustments replaces that attribute with func(current value), treating a missing
+    # attribute as the game's default. plain gdObjects are written to directly (skipping __setattr__) and their
+    # level, if it's watching them, is told afterwards
+    def transform(
+        self, move: Callable[[float, float], tuple[float, float]], adjustments: list[tuple[str, Any, Callable]] = ()
+    ) -> "gdSelection":
+        changed = []
+        watched = watched_class(gdObject)
+        for obj in self.objs:
+            if type(obj) != gdObject and type(obj) != watched:
+                for name, value in adjusted(obj.attributes(), move, adjustments).items():
+                    setattr(obj, name, value)
+                continue
+            attrs = obj.__dict__
+            x, y = move(attrs.get("x", 0.0), attrs.get("y", 0.0))
+            attrs["x"] = float(x)
+            attrs["y"] = float(y)
+            for name, default, func in adjustments:
+                value = adjust(name, attrs.get(name), default, func)
+                if value != None:
+                    attrs[name] = value
+            if type(obj) == watched:
+                changed.append(obj)
+        for obj in changed:
+            for name in ["x", "y"] + [name for name, default, func in adjustments]:
+                obj._owner.object_changed(obj, name)
+        return self
+
+
+# the attributes a gdSelection.transform changes, with their new values, for an object with the given attributes
+def adjusted(attrs: dict[str, Any], move: Callable, adjustments: list[tuple[str, Any, Callable]]) -> dict[str, Any]:
+    x, y = move(attrs.get("x", gdObject.x), attrs.get("y", gdObject.y))
+    new = {"x": float(x), "y": float(y)}
+    for name, default, func in adjustments:
+        value = adjust(name, new.get(name, attrs.get(name)), default, func)
+        if value != None:
+            new[name] = value
+    return new
+
+
+# func(value) for an attribute value, or func(default) if it's missing; None if that leaves it at the default anyway.
+# numbers are cast to the attribute's type in obj_attr_map, so rotations are rounded to whole degrees
+def adjust(name: str, value: Any, default: Any, func: Callable[[Any], Any]) -> Any:
+    result = func(default if value == None else value)
+    declared = obj_attr_codecs[obj_attr_ids[name]].type
+    if declared == int and type(result) == float:
+        result = round(result)
+    elif declared == float and type(result) == int:
+        result = float(result)
+    if value == None and result == default:
+        return None
+    return result
+
+
+# (cos, sin) of an angle; exact for multiples of 90 degrees, so rotated grid positions stay on the grid
+def turn(degrees: float) -> tuple[float, float]:
+    if degrees % 90 == 0:
+        return [(1, 0), (0, 1), (-1, 0), (0, -1)][int(degrees % 360) // 90]
+    return (math.cos(math.radians(degrees)), math.sin(math.radians(degrees)))
+
+
 # convert level string to level object
-def extract_level(lvlstring: str) -> gdLevel:
+# lazy makes the objects gdLazyObjects, which only decode attributes as they're used (see gdLazyObject)
+# workers > 1 (or None for one per core) parses large levels in a process pool, see extract_objects_parallel;
+# lazy objects are cheap enough to create that they are always made in this process
+# cache (a gdLevelCache) returns the level from the last time this exact level string was parsed, if it's there,
+# and stores it otherwise; lazy levels are never cached
+# track_changes records every object added, removed or changed from then on, see gdLevel.changes (the cache is
+# skipped, since tracking needs to know which segment of lvlstring each object was read from)
+# interner (a gdInterner, see objectInterning.py) reads the objects through it, sharing equal values and the
+# attributes of objects that only differ in position; this happens in this process
+def extract_level(
+    lvlstring: str,
+    lazy: bool = False,
+    workers: int | None = 1,
+    cache: Any = None,
+    track_changes: bool = False,
+    interner: Any = None,
+) -> gdLevel:
+    if track_changes:
+        cache = None
+    if cache != None and not lazy:
+        with stage("cache lookup") as timing:
+            lvl = cache.get(lvlstring)
+            if lvl != None:
+                timing.count(objects=len(lvl.objs), bytes_in=len(lvlstring))
+        if lvl != None:
+            return lvl
+
     # converting objects part of string into objects list
-    objs_as_string = lvlstring.split(";")[1:-1]
-    objs = []
-    for obj_str in objs_as_string:
-        split_obj_str = obj_str.split(",")
-        objs.append(
-            gdObject(
-                dict(
-                    zip(
-                        list(map(compress_type, split_obj_str[::2])),
-                        split_obj_str[1::2],
-                    )
+    with stage("parse objects") as timing:
+        if lazy:
+            objs = list(iter_objects(lvlstring, lazy))
+        elif interner != None:
+            objs = list(interner.iter_objects(lvlstring))
+        else:
+            objs = extract_objects_parallel(lvlstring, workers)
+        timing.count_segments(lvlstring)
+        timing.count(bytes_in=len(lvlstring))
+    if track_changes:
+        from gdio.levelPatch import gdChangeTracker
+
+        with stage("track changes") as timing:
+            tracker = gdChangeTracker(lvlstring, objs)  # objects still in level string order
+            timing.count(objects=len(objs))
+
+    with stage("parse colors") as timing:
+        cols = extract_colors(lvlstring)
+        timing.count(objects=len(cols))
+    with stage("build level") as timing:
+        lvl = gdLevel(objs, cols, extract_headers(lvlstring))
+        if track_changes:
+            lvl.add_index(tracker)
+        timing.count(objects=len(objs))
+    if cache != None and not lazy:
+        with stage("cache store") as timing:
+            cache.put(lvlstring, lvl)
+            timing.count(objects=len(objs))
+    return lvl
+
+
+# lazily convert the objects part of a level string into objects, one at a time, in level string order.
+# useful for scripts that only need to filter or count objects, since no gdLevel is ever built
+def iter_objects(lvlstring: str, lazy: bool = False) -> Iterator[gdObject]:
+    extract = gdLazyObject if lazy else extract_object
+    for obj_str in iter_object_strings(lvlstring):
+        yield extract(obj_str)
+
+
+# the object segments of a level string (same as lvlstring.split(";")[1:-1], without building the list)
+def iter_object_strings(lvlstring: str) -> Iterator[str]:
+    start = lvlstring.find(";") + 1
+    if start == 0:
+        return
+    end = lvlstring.find(";", start)
+    while end != -1:
+        yield lvlstring[start:end]
+        start = end + 1
+        end = lvlstring.find(";", start)
+
+
+# parallel parsing and encoding. the object section is cut into one large contiguous chunk per worker (at object
+# boundaries); each chunk is parsed or encoded in a separate process and the results are stitched back together in
+# order. objects travel between processes as plain attribute dicts, which pickle much faster than gdObjects.
+# levels too small to give every worker at least min_chunk_objects objects use fewer workers, down to none at all,
+# since starting a pool and shipping the data costs more than it saves on small levels.
+# where processes are spawned rather than forked (windows), each worker imports the script's main module again, so
+# the script has to keep its top level code under if __name__ == "__main__":. when a pool can't start (or its
+# workers die), the work is done in this process instead
+min_chunk_objects = 25000
+approx_object_bytes = 40  # for estimating object counts from the length of a level string
+
+
+# how many chunks to split the given number of objects into
+def parallel_chunks(objects: int, workers: int | None) -> int:
+    if workers == None:
+        workers = os.cpu_count() or 1
+    return max(1, min(workers, objects // min_chunk_objects))
+
+
+# the objects of a level string, parsed in up to workers processes, in level string order
+def extract_objects_parallel(lvlstring: str, workers: int | None = 1) -> list[gdObject]:
+    start, end = lvlstring.find(";") + 1, lvlstring.rfind(";") + 1
+    chunks = parallel_chunks((end - start) // approx_object_bytes, workers) if start > 0 else 1
+    if chunks == 1:
+        return list(iter_objects(lvlstring))
+
+    bounds = [start]
+    for i in range(1, chunks):
+        bounds.append(max(bounds[-1], lvlstring.find(";", start + (end - start) * i // chunks - 1) + 1))
+    bounds.append(end)
+    try:
+        with ProcessPoolExecutor(chunks) as pool:
+            results = list(pool.map(extract_chunk, [lvlstring[a:b] for a, b in zip(bounds, bounds[1:])]))
+    except (BrokenProcessPool, OSError):
+        return list(iter_objects(lvlstring))
+    with paused_gc():  # millions of new dicts would otherwise trigger a lot of pointless collections
+        return [detached_object(attrs) for result in results for attrs in result]
+
+
+# the objects in a run of ";"-terminated object segments, as attribute dicts (run in the pool's processes)
+def extract_chunk(chunk: str) -> list[dict[str, Any]]:
+    with paused_gc():
+        return [extract_object(obj_str).__dict__ for obj_str in chunk.split(";")[:-1]]
+
+
+# the object section of a level string for the given objects, encoded in up to workers processes
+def compress_objects_parallel(objs: list[gdObject], strict: bool = False, workers: int | None = 1) -> str:
+    chunks = parallel_chunks(len(objs), workers)
+    if chunks == 1:
+        return "".join([obj.compress(strict) + ";" for obj in objs])
+
+    # unchanged lazy objects are already encoded, so they are sent as is
+    payload = [obj.compress(strict) if isinstance(obj, gdLazyObject) else obj.attributes() for obj in objs]
+    size = -(-len(payload) // chunks)
+    try:
+        with ProcessPoolExecutor(chunks) as pool:
+            return "".join(
+                pool.map(
+                    compress_chunk, [payload[i : i + size] for i in range(0, len(payload), size)], [strict] * chunks
                 )
             )
-        )
-    objs.sort(key=lambda obj: (getattr(obj, "x"), getattr(obj, "y"), getattr(obj, "ID")))
+    except (BrokenProcessPool, OSError):
+        return "".join([obj.compress(strict) + ";" for obj in objs])
+
+
+# the encoded object segments for a list of attribute dicts or already encoded objects (run in the pool's processes)
+def compress_chunk(payload: list[dict[str, Any] | str], strict: bool = False) -> str:
+    return "".join([(item if type(item) == str else detached_object(item).compress(strict)) + ";" for item in payload])
+
+
+# garbage collection switched off for the duration of a bulk allocation (and back on afterwards if it was on)
+class paused_gc:
+    def __enter__(self) -> None:
+        self.enabled = gc.isenabled()
+        gc.disable()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        if self.enabled:
+            gc.enable()
+
+
+# convert a single object segment of a level string (without the trailing ;) into an object.
+# every value is converted exactly once, by a decoder looked up from the key as it's written in the string;
+# the result is the same as gdObject(dict(...)) on the split segment
+def extract_object(obj_str: str) -> gdObject:
+    obj = gdObject.__new__(gdObject)
+    attrs = obj.__dict__
+    split_obj_str = iter(obj_str.split(","))
+    for key, value in zip(split_obj_str, split_obj_str):
+        name, decode = obj_attr_decoders.get(key) or resolve_obj_key(key)
+        attrs[name] = decode(value)
+    assert "ID" in attrs and "x" in attrs and "y" in attrs
+    return obj
+
+
+# (attribute name, decoder) for every known attribute, keyed by its ID as written in a level string
+# decoders return the attribute's type directly; transformed attributes already decode to it
+obj_attr_decoders = {
+    key: (obj_attr_codecs[mapkey].name, obj_attr_codecs[mapkey].decode or obj_attr_codecs[mapkey].cast)
+    for key, mapkey in obj_attr_keys.items()
+}
+
+
+# (attribute name, decoder) for keys missing from obj_attr_decoders, resolved the same way gdObject.__init__ would
+def resolve_obj_key(key: str) -> tuple[str, Callable[[str], Any]]:
+    if key not in unmapped_obj_keys:
+        mapkey = compress_type(key)
+        if type(mapkey) == str:
+            if re.match(r"^kA\d+$", mapkey) == None:
+                raise Exception("Provided key name ({}) not found in list of permitted attributes".format(mapkey))
+            unmapped_obj_keys[key] = (mapkey, lambda value: compress_type(value) != 0)
+        elif mapkey in obj_attr_codecs:
+            unmapped_obj_keys[key] = obj_attr_decoders[str(mapkey)]
+        else:
+            unmapped_obj_keys[key] = (str(mapkey), str)  # kept as the raw string
+    return unmapped_obj_keys[key]
+
+
+# cache for resolve_obj_key; level strings only ever use a handful of distinct unmapped keys
+unmapped_obj_keys = {}
+
+
+# builds the function that writes one attribute back out as "key<separator>value", the way compress always has:
+# booleans as 1/0, and attributes with an encode transform (text, hsv, groups) passed through it
+def compile_attr_encoder(
+    key: int | str, encode: Callable[[Any], str] | None, separator: str
+) -> Callable[[Any], str]:
+    prefix = str(key) + separator
+    if encode == None:
+
+        def encoder(value: Any) -> str:
+            if type(value) == bool:
+                return prefix + ("1" if value else "0")
+            return prefix + str(value)
+
+    else:
+
+        def encoder(value: Any) -> str:
+            if type(value) == bool:
+                value = 1 if value else 0
+            return prefix + encode(value)
+
+    return encoder
+
+
+# encoders for every known attribute, keyed by attribute name
+obj_attr_encoders = {codec.name: compile_attr_encoder(key, codec.encode, ",") for key, codec in obj_attr_codecs.items()}
+col_attr_encoders = {codec.name: compile_attr_encoder(key, codec.encode, "_") for key, codec in col_attr_codecs.items()}
+
+
+# encoders for attributes outside the maps (kA flags, unmapped IDs), which are written out under their own name
+def resolve_obj_encoder(key: str) -> Callable[[Any], str]:
+    if key not in unmapped_obj_encoders:
+        unmapped_obj_encoders[key] = compile_attr_encoder(key, None, ",")
+    return unmapped_obj_encoders[key]
+
+
+def resolve_col_encoder(key: str) -> Callable[[Any], str]:
+    if key not in unmapped_col_encoders:
+        unmapped_col_encoders[key] = compile_attr_encoder(key, None, "_")
+    return unmapped_col_encoders[key]
+
+
+unmapped_obj_encoders = {}
+unmapped_col_encoders = {}
+
 
-    # converting colors part of string into color list
+# convert colors part of level string into color list, in level string order (gdLevel sorts them by channel)
+def extract_colors(lvlstring: str) -> list[gdColor]:
     cols_as_string = lvlstring[lvlstring.index("kS38,") + 5 : lvlstring.index(",kA13") - 1].split("|")
     cols = []
     for col_str in cols_as_string:
@@ -252,23 +1082,23 @@ def extract_level(lvlstring: str) -> gdLevel:
             gdColor(
                 dict(
                     zip(
-                        list(map(compress_type, split_col_str[::2])),
+                        [col_attr_keys[key] if key in col_attr_keys else compress_type(key) for key in split_col_str[::2]],
                         split_col_str[1::2],
                     )
                 )
             )
         )
-    cols.sort(key=lambda col: col.ID)
+    return cols
 
-    # preserving level headers
-    headers = lvlstring[lvlstring.rfind("|") + 1 : lvlstring.find(";") + 1]
 
-    return gdLevel(objs, cols, headers)
+# preserving level headers
+def extract_headers(lvlstring: str) -> str:
+    return lvlstring[lvlstring.rfind("|") + 1 : lvlstring.find(";") + 1]
 
 
 # convert level object to level string
-def compress_level(lvl: gdLevel) -> str:
-    return lvl.compress()
+def compress_level(lvl: gdLevel, strict: bool = False) -> str:
+    return lvl.compress(strict)
 
 
 # converts value to float if possible, then to integer if possible, otherwise string
@@ -0,0 +1,154 @@
+import heapq
+import math
+from typing import Any, Iterable, Iterator
+
+# a uniform grid (column -> row -> objects) over objects' x/y positions, for region and neighborhood queries.
+# kept up to date by the gdLevel holding it (see gdLevel.spatial_index)
+
+
+def position(obj: Any) -> tuple:
+    return (getattr(obj, "x"), getattr(obj, "y"))
+
+
+# the (x, y, ID) ordering gdLevel keeps its objects in
+def position_key(obj: Any) -> tuple:
+    return (getattr(obj, "x"), getattr(obj, "y"), getattr(obj, "ID"))
+
+
+class gdSpatialIndex:
+    def __init__(self, objs: Iterable[Any] = (), cell_size: float = 150.0) -> None:
+        self.cell_size = cell_size  # in GD units (one block is 30)
+        self.reset(objs)
+
+    def __len__(self) -> int:
+        return len(self.cell_of)
+
+    def __contains__(self, obj: Any) -> bool:
+        return obj in self.cell_of
+
+    def reset(self, objs: Iterable[Any] = ()) -> None:
+        self.cells: dict[int, dict[int, set]] = {}  # column -> row -> objects
+        self.cell_of: dict[Any, tuple[int, int]] = {}  # object -> (column, row) it is filed under
+        for obj in objs:
+            self.add(obj)
+
+    def cell(self, x: float, y: float) -> tuple[int, int]:
+        return (math.floor(x / self.cell_size), math.floor(y / self.cell_size))
+
+    def add(self, obj: Any) -> None:
+        if obj in self.cell_of:
+            return
+        cx, cy = self.cell(*position(obj))
+        self.cells.setdefault(cx, {}).setdefault(cy, set()).add(obj)
+        self.cell_of[obj] = (cx, cy)
+
+    def remove(self, obj: Any) -> None:
+        if obj not in self.cell_of:
+            return
+        cx, cy = self.cell_of.pop(obj)
+        column = self.cells[cx]
+        column[cy].discard(obj)
+        if not column[cy]:
+            del column[cy]
+            if not column:
+                del self.cells[cx]
+
+    # called when an attribute of an indexed object changed; only a move can change its cell
+    def update(self, obj: Any, name: str) -> None:
+        if (name == "x" or name == "y") and obj in self.cell_of:
+            if self.cell(*position(obj)) != self.cell_of[obj]:
+                self.remove(obj)
+                self.add(obj)
+
+    # the columns overlapping [cx0, cx1], iterating whichever is smaller: the range or the occupied columns
+    def columns(self, cx0: int, cx1: int) -> Iterator[dict[int, set]]:
+        if cx1 - cx0 + 1 <= len(self.cells):
+            for cx in range(cx0, cx1 + 1):
+                if cx in self.cells:
+                    yield self.cells[cx]
+        else:
+            for cx, column in self.cells.items():
+                if cx0 <= cx <= cx1:
+                    yield column
+
+    # objects with x0 <= x <= x1 and y0 <= y <= y1, in (x, y, ID) order; leave y0/y1 as None for the whole height
+    def in_rect(self, x0: float, y0: float | None, x1: float, y1: float | None) -> list[Any]:
+        cx0, cx1 = math.floor(x0 / self.cell_size), math.floor(x1 / self.cell_size)
+        found = []
+        for column in self.columns(cx0, cx1):
+            if y0 == None or y1 == None:
+                rows = column.values()
+            else:
+                cy0, cy1 = math.floor(y0 / self.cell_size), math.floor(y1 / self.cell_size)
+                rows = [objs for cy, objs in column.items() if cy0 <= cy <= cy1]
+            for objs in rows:
+                for obj in objs:
+                    x, y = position(obj)
+                    if x0 <= x <= x1 and (y0 == None or y0 <= y) and (y1 == None or y <= y1):
+                        found.append(obj)
+        found.sort(key=position_key)
+        return found
+
+    # objects with x0 <= x <= x1, in (x, y, ID) order
+    def in_x_range(self, x0: float, x1: float) -> list[Any]:
+        return self.in_rect(x0, None, x1, None)
+
+    # objects within radius units of (x, y), in (x, y, ID) order
+    def in_radius(self, x: float, y: float, radius: float) -> list[Any]:
+        return [
+            obj
+            for obj in self.in_rect(x - radius, y - radius, x + radius, y + radius)
+            if math.hypot(getattr(obj, "x") - x, getattr(obj, "y") - y) <= radius
+        ]
+
+    # the k objects closest to (x, y), nearest first (ties broken by (x, y, ID));
+    # searches outwards ring by ring of cells until nothing further out can be closer
+    def nearest(self, x: float, y: float, k: int = 1) -> list[Any]:
+        if k <= 0 or not self.cell_of:
+            return []
+        cx0, cy0 = self.cell(x, y)
+        best: list[tuple] = []  # max-heap (negated) of the k closest so far
+        seen = 0
+        ring = 0
+        while seen < len(self.cell_of):
+            if ring * ring > len(self.cell_of):  # far from everything; cheaper to look at the rest directly
+                for cx, column in self.cells.items():
+                    for cy, objs in column.items():
+                        if max(abs(cx - cx0), abs(cy - cy0)) >= ring:
+                            for obj in objs:
+                                self.offer(best, k, obj, x, y)
+                break
+            for objs in self.ring(cx0, cy0, ring):
+                seen += len(objs)
+                for obj in objs:
+                    self.offer(best, k, obj, x, y)
+            # anything outside the rings searched so far is at least ring * cell_size away
+            if len(best) == k and -best[0][0] <= ring * self.cell_size:
+                break
+            ring += 1
+        return [entry[-1] for entry in sorted(best, key=lambda entry: entry[:2], reverse=True)]
+
+    def offer(self, best: list[tuple], k: int, obj: Any, x: float, y: float) -> None:
+        key = position_key(obj)
+        entry = (-math.hypot(key[0] - x, key[1] - y), tuple(-v for v in key), id(obj), obj)
+        if len(best) < k:
+            heapq.heappush(best, entry)
+        elif entry[:2] > best[0][:2]:
+            heapq.heapreplace(best, entry)
+
+    # the occupied cells at chebyshev distance ring from (cx0, cy0)
+    def ring(self, cx0: int, cy0: int, ring: int) -> Iterator[set]:
+        for cx in range(cx0 - ring, cx0 + ring + 1):
+            column = self.cells.get(cx)
+            if column == None:
+                continue
+            if cx == cx0 - ring or cx == cx0 + ring:
+                if 2 * ring + 1 <= len(column):
+                    rows = (column.get(cy) for cy in range(cy0 - ring, cy0 + ring + 1))
+                else:
+                    rows = (objs for cy, objs in column.items() if cy0 - ring <= cy <= cy0 + ring)
+            else:
+                rows = (column.get(cy0 - ring), column.get(cy0 + ring))
+            for objs in rows:
+                if objs:
+                    yield objs
@@ -15,7 +15,9 @@ def __main__():
     lsi.write_leveldata(pl.compress_level(lvl), False)
 
 
-start = time.time()
-__main__()
-end = time.time()
-print(str(round(end - start, 6)) + "s")
+# keep this guard: extract_level(..., workers=...) starts worker processes, which import this file again on windows
+if __name__ == "__main__":
+    start = time.time()
+    __main__()
+    end = time.time()
+    print(str(round(end - start, 6)) + "s")